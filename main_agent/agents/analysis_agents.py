@@ -1,5 +1,7 @@
 from google.adk.agents import LlmAgent
 from main_agent.core.config import settings
+from main_agent.core.llm import resilient_model
+from main_agent.evidence.video import attach_video_evidence
 from main_agent.prompts.instructions import (
     VIDEO_ANALYSIS_AGENT_INSTRUCTION,
     AUDIO_ANALYSIS_AGENT_INSTRUCTION,
@@ -8,15 +10,16 @@ from main_agent.prompts.instructions import (
 
 video_analysis_agent = LlmAgent(
     name="VideoAnalysisAgent",
-    model=settings.VISION_MODEL,
+    model=resilient_model(settings.VISION_MODEL, "VideoAnalysisAgent"),
     instruction=VIDEO_ANALYSIS_AGENT_INSTRUCTION,
     description="Analyzes video evidence from classroom observations if available.",
-    output_key="video_analysis_summary"
+    output_key="video_analysis_summary",
+    before_model_callback=attach_video_evidence,
 )
 
 audio_analysis_agent = LlmAgent(
     name="AudioAnalysisAgent",
-    model=settings.TEXT_MODEL,
+    model=resilient_model(settings.TEXT_MODEL, "AudioAnalysisAgent"),
     instruction=AUDIO_ANALYSIS_AGENT_INSTRUCTION,
     description="Analyzes audio evidence from classroom recordings if available.",
     output_key="audio_analysis_summary"
@@ -24,7 +27,7 @@ audio_analysis_agent = LlmAgent(
 
 text_analysis_agent = LlmAgent(
     name="TextAnalysisAgent",
-    model=settings.TEXT_MODEL,
+    model=resilient_model(settings.TEXT_MODEL, "TextAnalysisAgent"),
     instruction=TEXT_ANALYSIS_AGENT_INSTRUCTION,
     description="Analyzes textual evidence like notes and documents if available.",
     output_key="text_analysis_summary"
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
 
@@ -11,10 +11,58 @@ class Settings(BaseSettings):
     QDRANT_COLLECTION_NAME: str = "uae-inspection-framework"
     PDF_DATA_DIR: str = "output_reports"
 
+    # Report Store Config (retention is disabled when unset)
+    REPORT_INDEX_FILE: str = "reports.sqlite3"
+    REPORT_RETENTION_DAYS: Optional[int] = None
+    REPORT_MAX_COUNT: Optional[int] = None
+
     # Model Config
     TEXT_MODEL: str = "gemini-2.5-flash"
     VISION_MODEL: str = "gemini-2.5-flash"
 
+    # Resilience Config (timeouts in seconds)
+    MODEL_DEADLINE_SECONDS: float = 180.0
+    MODEL_ATTEMPT_TIMEOUT_SECONDS: float = 90.0
+    RETRIEVAL_DEADLINE_SECONDS: float = 30.0
+    RETRIEVAL_ATTEMPT_TIMEOUT_SECONDS: float = 15.0
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY_SECONDS: float = 0.5
+    RETRY_MAX_DELAY_SECONDS: float = 8.0
+    HEDGE_MODEL_CALLS: bool = False
+    HEDGE_RETRIEVAL_CALLS: bool = True
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_SECONDS: float = 30.0
+
+    # Quota Scheduler Config (per-model limits, shared by all sessions of the process)
+    QUOTA_MODEL_LIMITS: Dict[str, Dict[str, int]] = {
+        "gemini-2.5-flash": {"rpm": 1000, "tpm": 1_000_000},
+        "text-embedding-004": {"rpm": 1500, "tpm": 1_000_000},
+    }
+    QUOTA_DEFAULT_RPM: int = 60
+    QUOTA_DEFAULT_TPM: int = 250_000
+    # Lower runs first: the last pipeline steps are admitted before new analysis runs
+    QUOTA_PRIORITIES: Dict[str, int] = {"FinalReportAgent": 0, "SynthesisAgent": 1, "retrieval": 1}
+    QUOTA_DEFAULT_PRIORITY: int = 2
+    QUOTA_OUTPUT_TOKEN_ESTIMATE: int = 2000  # reserved per request until the real usage is known
+    QUOTA_FILE_TOKEN_ESTIMATE: int = 50_000  # reserved per attached file (video is ~300 tokens per second)
+    QUOTA_THROTTLE_PAUSE_SECONDS: float = 5.0  # admissions pause after a 429
+
+    # Retrieval Config
+    RETRIEVAL_TOP_K: int = 2
+    RETRIEVAL_MAX_CHUNK_CHARS: int = 7000  # largest framework chunk (MAX_ATOMIC_CHUNK_CHARS in scripts/markdown_chunking.py)
+    RETRIEVAL_TOKEN_BUDGET: Optional[int] = None  # estimated tokens per tool call; defaults to RETRIEVAL_TOP_K whole chunks
+    RETRIEVAL_MERGE_GAP_CHARS: int = 16  # chunks of one source closer than this are merged (blank lines between chunks)
+
+    # Evidence Extraction Config
+    MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024
+    MAX_EVIDENCE_PAGES: int = 300
+    OVERSIZE_POLICY: str = "truncate"  # "truncate" or "reject" documents above MAX_EVIDENCE_PAGES
+    EXTRACTION_WORKERS: int = 4
+    EXTRACTION_PAGES_PER_TASK: int = 10
+    EVIDENCE_FILE_WORKERS: int = 4  # files of an evidence pack extracted concurrently
+    MAX_EVIDENCE_CHARS: int = 400_000  # per pipeline input (textual evidence, audio transcripts)
+    VIDEO_PROCESSING_TIMEOUT_SECONDS: float = 600.0  # Gemini Files API processing of an uploaded video
+
 class Config:
     env_file = ".env"
     extra = "ignore"
@@ -0,0 +1,94 @@
+# main_agent/core/llm.py
+from typing import AsyncGenerator, List
+
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+
+from main_agent.core.config import settings
+from main_agent.core.quota import estimate_tokens, get_scheduler, is_throttled, priority_for
+from main_agent.core.resilience import get_caller, model_policy
+
+
+def _request_tokens(llm_request: LlmRequest) -> int:
+    """
+    Estimated tokens of a request: prompt text, system instruction, attached files and expected output.
+
+    The size of an attached file (e.g. a video) is not known before the request,
+    so each one counts as QUOTA_FILE_TOKEN_ESTIMATE; the grant is settled with
+    the real usage once the response arrives.
+    """
+    parts = [part for content in llm_request.contents for part in (content.parts or [])]
+    text = "".join(part.text or "" for part in parts)
+    system_instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(system_instruction, str):
+        text += system_instruction
+    files = sum(1 for part in parts if part.file_data or part.inline_data)
+    return (
+        estimate_tokens(text)
+        + files * settings.QUOTA_FILE_TOKEN_ESTIMATE
+        + settings.QUOTA_OUTPUT_TOKEN_ESTIMATE
+    )
+
+
+class ResilientGemini(Gemini):
+    """
+    Gemini model whose requests go through the shared `ResilientCaller` of its agent.
+
+    Each request gets the model deadline, retries with jittered backoff, optional
+    hedging and the agent's circuit breaker. Every attempt is first admitted by
+    the shared quota scheduler at the agent's priority; retries keep the
+    request's place in the queue, and the wait counts only against the overall
+    deadline, not the attempt timeout, breaker or latency histogram. A hedged
+    duplicate is admitted on its own, within the attempt. Responses
+    of a request are gathered before being yielded, so a retried attempt never
+    leaks partial output.
+    """
+    caller_name: str = "model"
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        caller = get_caller(self.caller_name, model_policy())
+        scheduler = get_scheduler()
+        tokens = _request_tokens(llm_request)
+        ticket = scheduler.new_ticket()
+        grant = None
+
+        async def admit() -> None:
+            nonlocal grant
+            grant = await scheduler.acquire(self.model, tokens, priority_for(self.caller_name), ticket=ticket)
+
+        async def attempt() -> List[LlmResponse]:
+            nonlocal grant
+            # admit() grants the first request of an attempt; a hedged duplicate is
+            # a second request to the API, so it is admitted separately
+            own_grant, grant = grant, None
+            if own_grant is None:
+                own_grant = await scheduler.acquire(self.model, tokens, priority_for(self.caller_name), ticket=ticket)
+            # Gemini mutates the request it sends, so every attempt gets its own copy
+            request = llm_request.model_copy(update={"contents": list(llm_request.contents)})
+            try:
+                responses = [
+                    response
+                    async for response in Gemini.generate_content_async(self, request, stream)
+                ]
+            except Exception as e:
+                if is_throttled(e):
+                    scheduler.report_throttled(self.model)
+                raise
+            usage = [r.usage_metadata.total_token_count for r in responses if r.usage_metadata]
+            own_grant.settle(max((count for count in usage if count), default=None))
+            return responses
+
+        for response in await caller.call(attempt, admit=admit):
+            yield response
+
+
+def resilient_model(model_name: str, agent_name: str) -> ResilientGemini:
+    """
+    Builds the model used by an agent, with its own retry policy, breaker and histogram.
+
+    Args:
+        model_name: Gemini model name, e.g. settings.TEXT_MODEL.
+        agent_name: Name of the agent; used as the caller name in latency reports.
+    """
+    return ResilientGemini(model=model_name, caller_name=agent_name)
@@ -0,0 +1,241 @@
+# main_agent/core/quota.py
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from main_agent.core.config import settings
+from main_agent.core.resilience import LatencyHistogram
+
+# Rolling window of the RPM/TPM limits, in seconds
+WINDOW_SECONDS = 60.0
+# Waiters re-check capacity at least this often, so settled token counts are picked up
+MAX_POLL_SECONDS = 2.0
+# Rough characters-per-token ratio used to estimate request size before sending it
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class ModelLimits:
+    """Requests and tokens per minute allowed for one model."""
+    rpm: int
+    tpm: int
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    loop: asyncio.AbstractEventLoop = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class Grant:
+    """Permission to send one request; `settle` corrects the token estimate afterwards."""
+    def __init__(self, quota: "_ModelQuota", entry: List[float], lock: threading.Lock):
+        self._quota = quota
+        self._entry = entry
+        self._lock = lock
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        """Replaces the estimated token count with the count reported by the API."""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self._entry[1] = actual_tokens
+
+
+class _ModelQuota:
+    """Sliding-window usage, waiting queue and metrics of one model."""
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.window: Deque[List[float]] = deque()  # [granted_at, tokens]
+        self.queue: List[_Waiter] = []
+        self.paused_until = 0.0
+        self.granted = 0
+        self.throttled = 0
+        self.wait_times: Dict[int, LatencyHistogram] = {}
+
+    def prune(self, now: float) -> None:
+        while self.window and now - self.window[0][0] >= WINDOW_SECONDS:
+            self.window.popleft()
+
+    def wait_time(self, now: float, tokens: int) -> float:
+        """Seconds until a request of `tokens` fits into both limits (0 if it fits now)."""
+        self.prune(now)
+        wait = max(0.0, self.paused_until - now)
+        if len(self.window) >= self.limits.rpm:
+            wait = max(wait, self.window[len(self.window) - self.limits.rpm][0] + WINDOW_SECONDS - now)
+        used = sum(entry[1] for entry in self.window)
+        if used + tokens > self.limits.tpm:
+            # Wait until enough of the oldest requests have left the window
+            excess = used + tokens - self.limits.tpm
+            for granted_at, entry_tokens in self.window:
+                excess -= entry_tokens
+                if excess <= 0:
+                    wait = max(wait, granted_at + WINDOW_SECONDS - now)
+                    break
+        return wait
+
+
+class QuotaScheduler:
+    """
+    Process-wide admission control for model and embedding requests.
+
+    Every request waits in a per-model priority queue (lower number first, FIFO
+    within a priority) until it fits into the model's requests-per-minute and
+    tokens-per-minute budget, so bursts from many sessions are smoothed out
+    instead of turning into 429s. Work closest to completion (the final report)
+    is admitted before new analysis runs.
+
+    The scheduler is thread-safe and may be used from several event loops
+    (Streamlit runs each inspection in its own `asyncio.run`).
+    """
+    def __init__(
+        self,
+        limits: Dict[str, ModelLimits],
+        default_limits: ModelLimits,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._limits = limits
+        self._default_limits = default_limits
+        self._clock = clock
+        self._quotas: Dict[str, _ModelQuota] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _quota(self, model: str) -> _ModelQuota:
+        quota = self._quotas.get(model)
+        if quota is None:
+            quota = _ModelQuota(self._limits.get(model, self._default_limits))
+            self._quotas[model] = quota
+        return quota
+
+    def _dispatch(self, quota: _ModelQuota) -> Optional[float]:
+        """Grants queued requests in priority order while capacity lasts; returns the next wait."""
+        now = self._clock()
+        while quota.queue:
+            waiter = quota.queue[0]
+            if waiter.cancelled:
+                heapq.heappop(quota.queue)
+                continue
+            wait = quota.wait_time(now, waiter.tokens)
+            if wait > 0:
+                return wait
+            heapq.heappop(quota.queue)
+            entry = [now, waiter.tokens]
+            quota.window.append(entry)
+            quota.granted += 1
+            quota.wait_times.setdefault(waiter.priority, LatencyHistogram()).record(now - waiter.enqueued_at)
+            grant = Grant(quota, entry, self._lock)
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future, grant)
+        return None
+
+    def new_ticket(self) -> int:
+        """Returns a queue position; passing it to every retry of a request keeps its place in line."""
+        return next(self._seq)
+
+    async def acquire(self, model: str, tokens: int, priority: int, ticket: Optional[int] = None) -> Grant:
+        """
+        Waits until a request to `model` of about `tokens` tokens may be sent.
+
+        Args:
+            model: Model name, e.g. "gemini-2.5-flash".
+            tokens: Estimated tokens of the request (prompt plus expected output).
+            priority: Lower values are admitted first.
+            ticket: Position from `new_ticket`; a fresh one (the back of the queue) when omitted.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            quota = self._quota(model)
+            # A single request larger than the whole budget would otherwise wait forever
+            tokens = min(tokens, quota.limits.tpm)
+            seq = ticket if ticket is not None else next(self._seq)
+            waiter = _Waiter(priority, seq, tokens, self._clock(), loop, loop.create_future())
+            heapq.heappush(quota.queue, waiter)
+            delay = self._dispatch(quota)
+
+        try:
+            while True:
+                try:
+                    timeout = min(delay, MAX_POLL_SECONDS) if delay else MAX_POLL_SECONDS
+                    return await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+                except TimeoutError:
+                    with self._lock:
+                        delay = self._dispatch(quota)
+        except BaseException:
+            with self._lock:
+                waiter.cancelled = True
+            raise
+
+    def report_throttled(self, model: str) -> None:
+        """Pauses admissions for a model after the API answered 429 despite the budget."""
+        with self._lock:
+            quota = self._quota(model)
+            quota.throttled += 1
+            quota.paused_until = max(quota.paused_until, self._clock() + settings.QUOTA_THROTTLE_PAUSE_SECONDS)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth, window usage and wait-time histograms (by priority) of every model."""
+        with self._lock:
+            now = self._clock()
+            report = {}
+            for model, quota in self._quotas.items():
+                quota.prune(now)
+                report[model] = {
+                    "queue_depth": sum(1 for waiter in quota.queue if not waiter.cancelled),
+                    "requests_last_minute": len(quota.window),
+                    "tokens_last_minute": sum(entry[1] for entry in quota.window),
+                    "limits": {"rpm": quota.limits.rpm, "tpm": quota.limits.tpm},
+                    "granted": quota.granted,
+                    "throttled": quota.throttled,
+                    "wait_seconds_by_priority": {
+                        priority: histogram.snapshot() for priority, histogram in sorted(quota.wait_times.items())
+                    },
+                }
+            return report
+
+
+def _resolve(future: asyncio.Future, grant: Grant) -> None:
+    if not future.done():
+        future.set_result(grant)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def priority_for(name: str) -> int:
+    """Scheduling priority of an agent or tool (lower runs first)."""
+    return settings.QUOTA_PRIORITIES.get(name, settings.QUOTA_DEFAULT_PRIORITY)
+
+
+def is_throttled(exc: BaseException) -> bool:
+    return (getattr(exc, "code", None) or getattr(exc, "status_code", None)) == 429
+
+
+_scheduler: Optional[QuotaScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> QuotaScheduler:
+    """Returns the process-wide scheduler configured from settings.QUOTA_MODEL_LIMITS."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = QuotaScheduler(
+                {model: ModelLimits(**limits) for model, limits in settings.QUOTA_MODEL_LIMITS.items()},
+                ModelLimits(settings.QUOTA_DEFAULT_RPM, settings.QUOTA_DEFAULT_TPM),
+            )
+        return _scheduler
+
+
+def quota_metrics() -> Dict[str, Dict[str, Any]]:
+    return get_scheduler().metrics()
@@ -0,0 +1,381 @@
+# main_agent/core/report_store.py
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from main_agent.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    markdown_hash TEXT NOT NULL UNIQUE,
+    pdf_path TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS report_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    session_id TEXT NOT NULL,
+    school_id TEXT NOT NULL,
+    evidence_hash TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_school_created ON report_runs (school_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON report_runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_session ON report_runs (session_id);
+CREATE INDEX IF NOT EXISTS idx_runs_report ON report_runs (report_id);
+CREATE INDEX IF NOT EXISTS idx_runs_evidence ON report_runs (evidence_hash, model_version, prompt_version);
+"""
+
+LEGACY_REPORT_PATTERN = re.compile(r"^Inspection_Report_(\d{8}_\d{6})\.pdf$")
+
+
+@dataclass
+class ReportRecord:
+    """One generated report as seen by one inspection run."""
+    report_id: int
+    pdf_path: str
+    markdown_hash: str
+    size_bytes: int
+    session_id: str
+    school_id: str
+    evidence_hash: str
+    model_version: str
+    prompt_version: str
+    created_at: str
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks so large evidence files are not loaded at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReportStore:
+    """
+    Content-addressed store for generated PDF reports with an SQLite index.
+
+    Identical report Markdown is rendered once; later runs producing the same
+    content are recorded against the existing PDF. Since model output varies
+    between runs, re-runs of the same evidence pack with the same model and
+    prompts are found by `find_rerun` instead. Runs are indexed by school,
+    session, evidence and creation time, and old or excess reports can be evicted.
+    """
+    def __init__(self, root: str, index_file: str = "reports.sqlite3"):
+        self.root = root
+        self.index_path = os.path.join(root, index_file)
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.index_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_report(
+        self,
+        markdown_content: str,
+        render: Callable[[str, str], None],
+        session_id: str,
+        school_id: str = "",
+        evidence_hash: str = "",
+        model_version: str = "",
+        prompt_version: str = "",
+    ) -> Tuple[ReportRecord, bool]:
+        """
+        Stores a report, rendering the PDF only if this content is not stored yet.
+
+        Args:
+            markdown_content: The report in Markdown.
+            render: Writes the PDF for the given (markdown, file path); raises on failure.
+            session_id: ADK session that produced the report.
+            school_id: Identifier of the inspected school.
+            evidence_hash: Hash of the evidence the report is based on.
+            model_version: Model that wrote the report.
+            prompt_version: Version of the agent prompts.
+
+        Returns:
+            The stored record and whether a new PDF was rendered.
+        """
+        markdown_hash = hash_text(markdown_content)
+        now = datetime.now()
+        created = False
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, pdf_path FROM reports WHERE markdown_hash = ?", (markdown_hash,)
+            ).fetchone()
+
+        if row is None:
+            pdf_path = self._render(markdown_content, render, markdown_hash, now)
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT INTO reports (markdown_hash, pdf_path, size_bytes, created_at) VALUES (?, ?, ?, ?)",
+                        (markdown_hash, pdf_path, os.path.getsize(pdf_path), now.isoformat(timespec="seconds")),
+                    )
+                created = True
+            except sqlite3.IntegrityError:
+                # A concurrent run stored the same content first; drop this run's own copy
+                os.remove(pdf_path)
+        elif not os.path.exists(row["pdf_path"]):
+            # The PDF was removed outside the store; render it again and keep the report's run history
+            pdf_path = self._render(markdown_content, render, markdown_hash, now)
+            with self._connect() as conn:
+                updated = conn.execute(
+                    "UPDATE reports SET pdf_path = ?, size_bytes = ? WHERE id = ? AND pdf_path = ?",
+                    (pdf_path, os.path.getsize(pdf_path), row["id"], row["pdf_path"]),
+                ).rowcount
+            if updated:
+                created = True
+            else:
+                # A concurrent run restored the file first
+                os.remove(pdf_path)
+
+        with self._connect() as conn:
+            report_id = conn.execute(
+                "SELECT id FROM reports WHERE markdown_hash = ?", (markdown_hash,)
+            ).fetchone()["id"]
+            run_id = self._insert_run(
+                conn, report_id, session_id, school_id, evidence_hash, model_version, prompt_version, now
+            )
+
+        record = self._get_run(run_id)
+        self.enforce_retention(settings.REPORT_RETENTION_DAYS, settings.REPORT_MAX_COUNT)
+        return record, created
+
+    def _render(
+        self, markdown_content: str, render: Callable[[str, str], None], markdown_hash: str, now: datetime
+    ) -> str:
+        """Renders to a temporary file moved into place under a unique name; returns the final path."""
+        # The name is unique per render, so concurrent runs never write or delete each other's file
+        file_name = (
+            f"Inspection_Report_{now.strftime('%Y%m%d_%H%M%S')}_{markdown_hash[:8]}_{uuid.uuid4().hex[:6]}.pdf"
+        )
+        pdf_path = os.path.join(self.root, file_name)
+        temp_path = pdf_path + ".tmp"
+        try:
+            render(markdown_content, temp_path)
+            os.replace(temp_path, pdf_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return pdf_path
+
+    @staticmethod
+    def _insert_run(
+        conn: sqlite3.Connection,
+        report_id: int,
+        session_id: str,
+        school_id: str,
+        evidence_hash: str,
+        model_version: str,
+        prompt_version: str,
+        now: datetime,
+    ) -> int:
+        return conn.execute(
+            "INSERT INTO report_runs (report_id, session_id, school_id, evidence_hash, model_version, "
+            "prompt_version, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (report_id, session_id, school_id, evidence_hash, model_version, prompt_version,
+             now.isoformat(timespec="seconds")),
+        ).lastrowid
+
+    def find_rerun(self, evidence_hash: str, model_version: str, prompt_version: str) -> Optional[ReportRecord]:
+        """
+        Returns the latest report generated from the same evidence with the same model and
+        prompts whose PDF still exists, or None.
+        """
+        if not evidence_hash:
+            return None
+        with self._connect() as conn:
+            rows = conn.execute(
+                self._select() + " WHERE report_runs.evidence_hash = ? AND report_runs.model_version = ? "
+                "AND report_runs.prompt_version = ? ORDER BY report_runs.id DESC LIMIT 10",
+                (evidence_hash, model_version, prompt_version),
+            ).fetchall()
+        for row in rows:
+            if os.path.exists(row["pdf_path"]):
+                return self._to_record(row)
+        return None
+
+    def record_reuse(self, record: ReportRecord, session_id: str, school_id: str) -> ReportRecord:
+        """Records that a session reused an existing report instead of generating a new one."""
+        with self._connect() as conn:
+            run_id = self._insert_run(
+                conn, record.report_id, session_id, school_id, record.evidence_hash,
+                record.model_version, record.prompt_version, datetime.now(),
+            )
+        return self._get_run(run_id)
+
+    def _get_run(self, run_id: int) -> ReportRecord:
+        with self._connect() as conn:
+            row = conn.execute(self._select() + " WHERE report_runs.id = ?", (run_id,)).fetchone()
+        return self._to_record(row)
+
+    @staticmethod
+    def _select() -> str:
+        return (
+            "SELECT reports.id AS report_id, reports.pdf_path, reports.markdown_hash, reports.size_bytes, "
+            "report_runs.session_id, report_runs.school_id, report_runs.evidence_hash, "
+            "report_runs.model_version, report_runs.prompt_version, report_runs.created_at "
+            "FROM report_runs JOIN reports ON reports.id = report_runs.report_id"
+        )
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> ReportRecord:
+        return ReportRecord(**{key: row[key] for key in row.keys()})
+
+    def latest_for_session(self, session_id: str) -> Optional[ReportRecord]:
+        """Returns the most recent report produced in a session, if any."""
+        with self._connect() as conn:
+            row = conn.execute(
+                self._select() + " WHERE report_runs.session_id = ? ORDER BY report_runs.id DESC LIMIT 1",
+                (session_id,),
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def find(
+        self,
+        school_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+    ) -> List[ReportRecord]:
+        """
+        Looks up report runs by school and/or creation date, newest first.
+
+        Args:
+            school_id: Exact school identifier to match.
+            since: Only runs created at or after this time.
+            until: Only runs created before this time.
+            limit: Maximum number of records to return.
+        """
+        clauses, params = [], []
+        if school_id is not None:
+            clauses.append("report_runs.school_id = ?")
+            params.append(school_id)
+        if since is not None:
+            clauses.append("report_runs.created_at >= ?")
+            params.append(since.isoformat(timespec="seconds"))
+        if until is not None:
+            clauses.append("report_runs.created_at < ?")
+            params.append(until.isoformat(timespec="seconds"))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                self._select() + where + " ORDER BY report_runs.created_at DESC, report_runs.id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def enforce_retention(
+        self, max_age_days: Optional[int] = None, max_reports: Optional[int] = None
+    ) -> List[str]:
+        """
+        Evicts runs older than `max_age_days` and keeps at most `max_reports` PDFs
+        (least recently produced first). PDFs without remaining runs are deleted.
+
+        Returns:
+            Paths of the deleted PDF files.
+        """
+        if max_age_days is None and max_reports is None:
+            return []
+
+        with self._connect() as conn:
+            if max_age_days is not None:
+                cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec="seconds")
+                conn.execute("DELETE FROM report_runs WHERE created_at < ?", (cutoff,))
+            evicted = conn.execute(
+                "SELECT id, pdf_path FROM reports WHERE id NOT IN (SELECT report_id FROM report_runs)"
+            ).fetchall()
+            if max_reports is not None:
+                evicted += conn.execute(
+                    "SELECT reports.id, reports.pdf_path FROM reports "
+                    "JOIN (SELECT report_id, MAX(created_at) AS last_used FROM report_runs GROUP BY report_id) "
+                    "AS usage ON usage.report_id = reports.id "
+                    "ORDER BY usage.last_used DESC, reports.id DESC LIMIT -1 OFFSET ?",
+                    (max_reports,),
+                ).fetchall()
+            conn.executemany("DELETE FROM reports WHERE id = ?", [(row["id"],) for row in evicted])
+
+        removed = []
+        for row in evicted:
+            try:
+                os.remove(row["pdf_path"])
+                removed.append(row["pdf_path"])
+            except FileNotFoundError:
+                pass
+        if removed:
+            logging.info(f"Report store evicted {len(removed)} reports.")
+        return removed
+
+    def import_legacy(self) -> int:
+        """
+        Indexes `Inspection_Report_<timestamp>.pdf` files written before the store existed.
+
+        Their Markdown is unknown, so the file content hash stands in for the
+        Markdown hash and school, session and versions are left empty.
+
+        Returns:
+            The number of newly indexed reports.
+        """
+        imported = 0
+        for file_name in sorted(os.listdir(self.root)):
+            match = LEGACY_REPORT_PATTERN.match(file_name)
+            if not match:
+                continue
+            pdf_path = os.path.join(self.root, file_name)
+            created_at = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").isoformat(timespec="seconds")
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO reports (markdown_hash, pdf_path, size_bytes, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (f"file:{hash_file(pdf_path)}", pdf_path, os.path.getsize(pdf_path), created_at),
+                )
+                if cursor.rowcount:
+                    conn.execute(
+                        "INSERT INTO report_runs (report_id, session_id, school_id, evidence_hash, "
+                        "model_version, prompt_version, created_at) VALUES (?, '', '', '', '', '', ?)",
+                        (cursor.lastrowid, created_at),
+                    )
+                    imported += 1
+        return imported
+
+
+_store: Optional[ReportStore] = None
+_store_lock = threading.Lock()
+
+
+def get_report_store() -> ReportStore:
+    """Returns the process-wide report store rooted at settings.PDF_DATA_DIR."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReportStore(settings.PDF_DATA_DIR, settings.REPORT_INDEX_FILE)
+        return _store
@@ -0,0 +1,398 @@
+# main_agent/core/resilience.py
+import asyncio
+import bisect
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from main_agent.core.config import settings
+
+T = TypeVar("T")
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0]
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because its circuit breaker is open."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a call (including all retries) runs past its deadline."""
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Describes how a single backend (a model or a retrieval store) is called.
+
+    Attributes:
+        deadline: Total time budget in seconds for the call, across all attempts.
+        attempt_timeout: Time budget in seconds for a single attempt.
+        max_attempts: Maximum number of attempts, including the first one.
+        base_delay: Base delay in seconds of the exponential backoff.
+        max_delay: Upper bound in seconds of a single backoff delay.
+        hedge: Whether to send a duplicate request once an attempt is slower than p95.
+        hedge_min_samples: Number of recorded latencies required before hedging starts.
+        failure_threshold: Consecutive failures that open the circuit breaker.
+        reset_timeout: Seconds the breaker stays open before letting a trial call through.
+    """
+    deadline: float = 120.0
+    attempt_timeout: float = 60.0
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    hedge: bool = False
+    hedge_min_samples: int = 20
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Decides whether an exception is worth retrying.
+
+    Client errors (HTTP 4xx other than 408 and 429) are permanent and are
+    raised immediately; timeouts, connection problems, throttling and server
+    errors are retried.
+    """
+    if isinstance(exc, CircuitOpenError):
+        return False
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if isinstance(code, int) and 400 <= code < 500 and code not in (408, 429):
+        return False
+    return True
+
+
+class LatencyHistogram:
+    """
+    Thread-safe per-call latency histogram.
+
+    Keeps cumulative bucket counts for reporting and a bounded window of recent
+    samples for percentile estimates (used to decide when to hedge).
+    """
+    def __init__(self, buckets: Optional[List[float]] = None, window: int = 512):
+        self.buckets = list(buckets or LATENCY_BUCKETS)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._outcomes: Dict[str, int] = {}
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, outcome: str = "ok") -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self._recent.append(seconds)
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+            self._total += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the q-th percentile (0-100) of the recent samples, or None if empty."""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, round(q / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            outcomes = dict(self._outcomes)
+            total = self._total
+        count = sum(counts)
+        labels = [f"le_{b:g}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": count,
+            "mean": total / count if count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "outcomes": outcomes,
+            "buckets": dict(zip(labels, counts)),
+        }
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open circuit breaker.
+
+    After `failure_threshold` consecutive failures the breaker opens and every
+    call fails fast with `CircuitOpenError`. Once `reset_timeout` has elapsed a
+    single trial call is let through; its outcome closes or re-opens the breaker.
+    """
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self) -> bool:
+        """
+        Raises `CircuitOpenError` if the call must not be attempted.
+
+        Returns:
+            Whether the call is the single trial call of a half-open breaker.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._clock() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError("Circuit breaker is open; backend considered unavailable.")
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Gives up a trial call that never reached the backend, leaving the state unchanged."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class ResilientCaller:
+    """
+    Runs async calls against one backend under a `RetryPolicy`.
+
+    Every call gets an overall deadline, a per-attempt timeout, exponential
+    backoff with full jitter between attempts, an optional hedged duplicate
+    request once an attempt outlives the observed p95 latency, and a circuit
+    breaker that fails fast while the backend is down. Only retryable failures
+    (timeouts, throttling, server errors) count towards the breaker. Attempt
+    latencies are recorded in `histogram`.
+
+    `sleep`, `clock` and `rng` can be injected so fault and latency stubs can
+    drive the caller deterministically.
+    """
+    def __init__(
+        self,
+        name: str,
+        policy: Optional[RetryPolicy] = None,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        self.name = name
+        self.policy = policy or RetryPolicy()
+        self.histogram = LatencyHistogram()
+        self.breaker = CircuitBreaker(
+            self.policy.failure_threshold, self.policy.reset_timeout, clock=clock
+        )
+        self._sleep = sleep
+        self._clock = clock
+        self._rng = rng or random.Random()
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (1-based) failed attempt."""
+        ceiling = min(self.policy.max_delay, self.policy.base_delay * (2 ** (attempt - 1)))
+        return self._rng.uniform(0, ceiling)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a hedged duplicate is sent, or None when hedging is off."""
+        if not self.policy.hedge or self.histogram.count < self.policy.hedge_min_samples:
+            return None
+        return self.histogram.percentile(95)
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        admit: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> T:
+        """
+        Calls `fn` (a zero-argument coroutine factory) under the caller's policy.
+
+        Args:
+            fn: Creates a fresh awaitable for each attempt (and for each hedge).
+            admit: Awaited before each attempt (e.g. a quota scheduler grant). Its wait
+                is bounded only by the deadline and is kept out of the attempt timeout,
+                the latency histogram and the circuit breaker.
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+            DeadlineExceededError: If the overall deadline runs out.
+            Exception: The last error of a non-retryable or final failed attempt.
+        """
+        started = self._clock()
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = self.policy.deadline - (self._clock() - started)
+            if remaining <= 0:
+                raise DeadlineExceededError(f"{self.name}: deadline of {self.policy.deadline}s exceeded.")
+            is_trial = self.breaker.before_call()
+            if admit is not None:
+                try:
+                    async with asyncio.timeout(remaining):
+                        await admit()
+                    remaining = self.policy.deadline - (self._clock() - started)
+                    if remaining <= 0:
+                        raise TimeoutError()
+                except BaseException as e:
+                    # The call never reached the backend, so it says nothing about its health
+                    if is_trial:
+                        self.breaker.release_trial()
+                    if isinstance(e, TimeoutError):
+                        raise DeadlineExceededError(
+                            f"{self.name}: deadline of {self.policy.deadline}s exceeded waiting for admission."
+                        ) from e
+                    raise
+
+            attempt_started = self._clock()
+            try:
+                async with asyncio.timeout(min(self.policy.attempt_timeout, remaining)):
+                    result = await self._hedged(fn)
+            except asyncio.CancelledError:
+                # A cancelled trial (e.g. a sibling agent failed) must not keep the breaker jammed open
+                if is_trial:
+                    self.breaker.release_trial()
+                raise
+            except Exception as e:
+                elapsed = self._clock() - attempt_started
+                outcome = "timeout" if isinstance(e, TimeoutError) else "error"
+                self.histogram.record(elapsed, outcome)
+                if not is_retryable(e):
+                    # The backend answered; a rejected request says nothing about its health
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.policy.max_attempts:
+                    raise
+                delay = self.backoff_delay(attempt)
+                if self._clock() - started + delay >= self.policy.deadline:
+                    raise DeadlineExceededError(
+                        f"{self.name}: deadline of {self.policy.deadline}s exceeded after {attempt} attempts."
+                    ) from e
+                logging.warning(
+                    f"{self.name}: attempt {attempt} failed ({outcome}: {e}); retrying in {delay:.2f}s."
+                )
+                await self._sleep(delay)
+                continue
+
+            self.histogram.record(self._clock() - attempt_started, "ok")
+            self.breaker.record_success()
+            return result
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Runs one attempt, racing a duplicate request if the first one is slow."""
+        delay = self.hedge_delay()
+        if delay is None:
+            return await fn()
+
+        tasks = {asyncio.ensure_future(fn())}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                logging.info(f"{self.name}: attempt slower than p95 ({delay:.2f}s); sending hedged request.")
+                tasks.add(asyncio.ensure_future(fn()))
+
+            last_error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+# Process-wide registry so every agent/tool keeps its own breaker and histogram
+_callers: Dict[str, ResilientCaller] = {}
+_callers_lock = threading.Lock()
+
+
+def model_policy() -> RetryPolicy:
+    """Retry policy for Gemini model calls, built from settings."""
+    return RetryPolicy(
+        deadline=settings.MODEL_DEADLINE_SECONDS,
+        attempt_timeout=settings.MODEL_ATTEMPT_TIMEOUT_SECONDS,
+        max_attempts=settings.RETRY_MAX_ATTEMPTS,
+        base_delay=settings.RETRY_BASE_DELAY_SECONDS,
+        max_delay=settings.RETRY_MAX_DELAY_SECONDS,
+        hedge=settings.HEDGE_MODEL_CALLS,
+        failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.BREAKER_RESET_SECONDS,
+    )
+
+
+def retrieval_policy() -> RetryPolicy:
+    """Retry policy for knowledge base retrieval, built from settings."""
+    return RetryPolicy(
+        deadline=settings.RETRIEVAL_DEADLINE_SECONDS,
+        attempt_timeout=settings.RETRIEVAL_ATTEMPT_TIMEOUT_SECONDS,
+        max_attempts=settings.RETRY_MAX_ATTEMPTS,
+        base_delay=settings.RETRY_BASE_DELAY_SECONDS,
+        max_delay=settings.RETRY_MAX_DELAY_SECONDS,
+        hedge=settings.HEDGE_RETRIEVAL_CALLS,
+        failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.BREAKER_RESET_SECONDS,
+    )
+
+
+def get_caller(name: str, policy: Optional[RetryPolicy] = None) -> ResilientCaller:
+    """
+    Returns the shared `ResilientCaller` registered under `name`, creating it on first use.
+
+    Args:
+        name: Identifier of the agent or tool (e.g. "SynthesisAgent", "retrieval").
+        policy: Policy used when the caller is first created; ignored afterwards.
+    """
+    with _callers_lock:
+        caller = _callers.get(name)
+        if caller is None:
+            caller = ResilientCaller(name, policy)
+            _callers[name] = caller
+        return caller
+
+
+def latency_report() -> Dict[str, Dict[str, Any]]:
+    """Returns latency histograms and breaker states of every registered caller."""
+    with _callers_lock:
+        callers = list(_callers.values())
+    return {
+        caller.name: {**caller.histogram.snapshot(), "breaker": caller.breaker.state}
+        for caller in callers
+    }
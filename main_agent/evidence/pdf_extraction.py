@@ -0,0 +1,209 @@
+# main_agent/evidence/pdf_extraction.py
+import atexit
+import multiprocessing
+import os
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Deque, Iterator, List, Optional, Tuple
+
+import pymupdf
+import pymupdf4llm
+
+from main_agent.core.config import settings
+
+
+class EvidenceTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured byte or page ceiling."""
+
+
+@dataclass
+class ExtractionPlan:
+    """
+    Page ranges to extract from a PDF.
+
+    Attributes:
+        ranges: Half-open (start, stop) page ranges, in page order.
+        total_pages: Number of pages in the document.
+        pages_to_extract: Number of pages covered by `ranges`.
+        truncated: True when pages beyond MAX_EVIDENCE_PAGES were dropped.
+    """
+    ranges: List[Tuple[int, int]]
+    total_pages: int
+    pages_to_extract: int
+    truncated: bool
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Returns the process-wide extraction pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a multi-threaded process (Streamlit's script runner) can deadlock the
+            # child on locks held by other threads, so workers start from a clean process
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context(method),
+            )
+            atexit.register(_shutdown_pool)
+        return _pool
+
+
+def _shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def save_upload(upload: BinaryIO, size: int, directory: str, file_name: str) -> str:
+    """
+    Streams an uploaded file to disk after checking it against MAX_UPLOAD_BYTES.
+
+    Args:
+        upload: File-like object holding the upload (e.g. a Streamlit UploadedFile).
+        size: Size of the upload in bytes.
+        directory: Directory to save the file into.
+        file_name: Name of the saved file.
+
+    Returns:
+        The path of the saved file.
+
+    Raises:
+        EvidenceTooLargeError: If the upload is larger than MAX_UPLOAD_BYTES.
+    """
+    if size > settings.MAX_UPLOAD_BYTES:
+        raise EvidenceTooLargeError(
+            f"'{file_name}' is {size / 1024 / 1024:.1f} MB; "
+            f"the limit is {settings.MAX_UPLOAD_BYTES / 1024 / 1024:.0f} MB."
+        )
+    os.makedirs(directory, exist_ok=True)
+    file_path = os.path.join(directory, os.path.basename(file_name))
+    upload.seek(0)
+    with open(file_path, "wb") as f:
+        shutil.copyfileobj(upload, f)
+    return file_path
+
+
+def plan_extraction(pdf_path: str) -> ExtractionPlan:
+    """
+    Splits a PDF into page ranges, applying the MAX_EVIDENCE_PAGES ceiling.
+
+    Raises:
+        EvidenceTooLargeError: If the document is over the page ceiling and
+            OVERSIZE_POLICY is "reject".
+    """
+    with pymupdf.open(pdf_path) as doc:
+        total_pages = doc.page_count
+
+    pages_to_extract = min(total_pages, settings.MAX_EVIDENCE_PAGES)
+    truncated = pages_to_extract < total_pages
+    if truncated and settings.OVERSIZE_POLICY == "reject":
+        raise EvidenceTooLargeError(
+            f"The document has {total_pages} pages; the limit is {settings.MAX_EVIDENCE_PAGES}."
+        )
+
+    step = max(1, settings.EXTRACTION_PAGES_PER_TASK)
+    ranges = [
+        (start, min(start + step, pages_to_extract))
+        for start in range(0, pages_to_extract, step)
+    ]
+    return ExtractionPlan(ranges, total_pages, pages_to_extract, truncated)
+
+
+def _extract_page_range(
+    pdf_path: str, start: int, stop: int, hdr_info: pymupdf4llm.IdentifyHeaders
+) -> str:
+    """Worker entry point: converts pages [start, stop) of a PDF to Markdown."""
+    with pymupdf.open(pdf_path) as doc:
+        return pymupdf4llm.to_markdown(
+            doc, pages=list(range(start, stop)), hdr_info=hdr_info, write_images=False
+        )
+
+
+def iter_pdf_markdown(
+    pdf_path: str, plan: Optional[ExtractionPlan] = None
+) -> Iterator[Tuple[str, int]]:
+    """
+    Converts a PDF to Markdown page range by page range across the worker pool.
+
+    Results are yielded in page order as soon as they are available. At most
+    two ranges per worker are in flight, which bounds memory on large documents.
+
+    Args:
+        pdf_path: Path of the PDF on disk.
+        plan: Extraction plan; computed with `plan_extraction` when omitted.
+
+    Yields:
+        Tuples of (markdown for the range, number of pages extracted so far).
+    """
+    plan = plan or plan_extraction(pdf_path)
+    if not plan.ranges:
+        return
+
+    # Header levels are derived once from the whole document so ranges agree on them
+    with pymupdf.open(pdf_path) as doc:
+        hdr_info = pymupdf4llm.IdentifyHeaders(doc, pages=list(range(plan.pages_to_extract)))
+
+    # Small documents are not worth the round trip to the pool
+    if len(plan.ranges) == 1:
+        start, stop = plan.ranges[0]
+        yield _extract_page_range(pdf_path, start, stop, hdr_info), stop
+        return
+
+    pool = _get_pool()
+    max_in_flight = 2 * settings.EXTRACTION_WORKERS
+    pending: Deque[Tuple[int, Future]] = deque()
+    ranges = iter(plan.ranges)
+    try:
+        for start, stop in ranges:
+            pending.append((stop, pool.submit(_extract_page_range, pdf_path, start, stop, hdr_info)))
+            if len(pending) >= max_in_flight:
+                break
+        while pending:
+            stop, future = pending.popleft()
+            markdown_text = future.result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(
+                    (next_range[1], pool.submit(_extract_page_range, pdf_path, *next_range, hdr_info))
+                )
+            yield markdown_text, stop
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def extract_pdf_markdown(
+    pdf_path: str, on_progress: Optional[Callable[[int, int], None]] = None
+) -> Tuple[str, ExtractionPlan]:
+    """
+    Converts a PDF to Markdown with page-parallel extraction.
+
+    Args:
+        pdf_path: Path of the PDF on disk.
+        on_progress: Called with (pages extracted, pages to extract) after each range.
+
+    Returns:
+        The Markdown text and the extraction plan that was used.
+    """
+    plan = plan_extraction(pdf_path)
+    parts = []
+    for markdown_text, pages_done in iter_pdf_markdown(pdf_path, plan):
+        parts.append(markdown_text)
+        if on_progress:
+            on_progress(pages_done, plan.pages_to_extract)
+    if plan.truncated:
+        parts.append(
+            f"\n\n[Evidence truncated: only the first {plan.pages_to_extract} "
+            f"of {plan.total_pages} pages were extracted.]\n"
+        )
+    return "".join(parts), plan
@@ -0,0 +1,230 @@
+# main_agent/evidence/routing.py
+import hashlib
+import os
+import queue
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from main_agent.core.config import settings
+from main_agent.core.report_store import hash_file
+from main_agent.evidence.pdf_extraction import extract_pdf_markdown
+from main_agent.evidence.video import VIDEO_EVIDENCE_FILES, upload_video
+
+# Pipeline state keys each kind of evidence is routed to
+TEXTUAL_EVIDENCE = "textual_evidence"
+AUDIO_EVIDENCE = "audio_evidence_transcript"
+VIDEO_EVIDENCE = "video_evidence_uri"
+
+TEXT_EXTENSIONS = {".txt", ".md"}
+TRANSCRIPT_EXTENSIONS = {".vtt", ".srt"}
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".webm", ".avi", ".mkv", ".mpeg", ".mpg"}
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".aac", ".ogg", ".flac"}
+
+# Accepted by the uploader; raw audio is rejected with a hint to upload a transcript
+SUPPORTED_EXTENSIONS = sorted(
+    {".pdf"} | TEXT_EXTENSIONS | TRANSCRIPT_EXTENSIONS | VIDEO_EXTENSIONS | AUDIO_EXTENSIONS
+)
+
+SUBTITLE_TIMING_RE = re.compile(r"^\s*(\d+\s*$|\d{1,2}:\d{2}(:\d{2})?[.,]\d{3}\s*-->.*$|WEBVTT.*$|NOTE\b.*$)")
+
+
+@dataclass
+class EvidenceSource:
+    """One uploaded evidence file saved on disk."""
+    name: str
+    path: str
+    size_bytes: int
+
+
+@dataclass
+class ExtractedEvidence:
+    """
+    Result of extracting one evidence file.
+
+    Attributes:
+        source: The uploaded file.
+        route: Pipeline state key the evidence goes to, or None if it was skipped.
+        kind: Short description of the file type (pdf, text, transcript, video, audio).
+        content: Extracted text, or the Gemini Files API URI for video.
+        note: Warning or error to show next to the file (e.g. truncation).
+        mime_type: MIME type of an uploaded video.
+    """
+    source: EvidenceSource
+    route: Optional[str]
+    kind: str
+    content: str = ""
+    note: str = ""
+    mime_type: str = ""
+
+    @property
+    def chars(self) -> int:
+        return len(self.content)
+
+
+def route_for(file_name: str) -> Tuple[Optional[str], str]:
+    """
+    Decides which pipeline input a file feeds, based on its extension and name.
+
+    Text files with "transcript" in their name are treated as audio transcripts.
+
+    Returns:
+        The state key (or None if the file cannot be used) and the file kind.
+    """
+    stem, extension = os.path.splitext(file_name.lower())
+    if extension == ".pdf":
+        return TEXTUAL_EVIDENCE, "pdf"
+    if extension in TRANSCRIPT_EXTENSIONS:
+        return AUDIO_EVIDENCE, "transcript"
+    if extension in TEXT_EXTENSIONS:
+        return (AUDIO_EVIDENCE, "transcript") if "transcript" in stem else (TEXTUAL_EVIDENCE, "text")
+    if extension in VIDEO_EXTENSIONS:
+        return VIDEO_EVIDENCE, "video"
+    if extension in AUDIO_EXTENSIONS:
+        return None, "audio"
+    return None, extension.lstrip(".") or "unknown"
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def _clean_subtitles(text: str) -> str:
+    """Drops cue numbers, timings and headers from SRT/VTT files, keeping the spoken text."""
+    lines = [line.strip() for line in text.splitlines()]
+    return "\n".join(line for line in lines if line and not SUBTITLE_TIMING_RE.match(line))
+
+
+def extract_source(
+    source: EvidenceSource, on_pages: Optional[Callable[[int, int], None]] = None
+) -> ExtractedEvidence:
+    """Extracts one file according to its route. Errors are reported in `note`, not raised."""
+    route, kind = route_for(source.name)
+    evidence = ExtractedEvidence(source=source, route=route, kind=kind)
+    if route is None:
+        evidence.note = (
+            "Audio recordings are not transcribed; upload a transcript (.txt, .vtt or .srt) instead."
+            if kind == "audio" else f"Unsupported file type '{kind}'."
+        )
+        return evidence
+
+    try:
+        if kind == "pdf":
+            evidence.content, plan = extract_pdf_markdown(source.path, on_progress=on_pages)
+            if plan.truncated:
+                evidence.note = f"Only the first {plan.pages_to_extract} of {plan.total_pages} pages were extracted."
+        elif kind == "video":
+            # The model cannot open local paths; the video is uploaded and attached to its request
+            uploaded = upload_video(source.path, source.name)
+            evidence.content, evidence.mime_type = uploaded.uri, uploaded.mime_type
+        elif os.path.splitext(source.name.lower())[1] in TRANSCRIPT_EXTENSIONS:
+            evidence.content = _clean_subtitles(_read_text(source.path))
+        else:
+            evidence.content = _read_text(source.path)
+    except Exception as e:
+        evidence.route = None
+        evidence.content = ""
+        evidence.note = f"Could not extract this file: {e}"
+        return evidence
+
+    if not evidence.content.strip():
+        evidence.route = None
+        evidence.note = evidence.note or "No text could be extracted from this file."
+    return evidence
+
+
+def extract_evidence(
+    sources: List[EvidenceSource], on_progress: Optional[Callable[[str], None]] = None
+) -> List[ExtractedEvidence]:
+    """
+    Extracts all files of an evidence pack concurrently.
+
+    PDFs additionally use the page-parallel extraction pool. Progress messages
+    are delivered to `on_progress` on the calling thread, so it may update UI
+    elements that are bound to that thread.
+
+    Returns:
+        One result per source, in upload order.
+    """
+    messages: "queue.Queue[str]" = queue.Queue()
+    total = len(sources)
+
+    def run(source: EvidenceSource) -> ExtractedEvidence:
+        def on_pages(pages_done: int, total_pages: int) -> None:
+            messages.put(f"{source.name}: {pages_done}/{total_pages} pages")
+        return extract_source(source, on_pages)
+
+    def drain() -> None:
+        while not messages.empty():
+            message = messages.get_nowait()
+            if on_progress:
+                on_progress(message)
+
+    with ThreadPoolExecutor(max_workers=max(1, settings.EVIDENCE_FILE_WORKERS)) as executor:
+        futures = {executor.submit(run, source): index for index, source in enumerate(sources)}
+        results: Dict[int, ExtractedEvidence] = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            drain()
+            for future in done:
+                result = future.result()
+                results[futures[future]] = result
+                if on_progress:
+                    on_progress(f"Extracted {len(results)}/{total} files ({result.source.name})")
+    return [results[index] for index in range(total)]
+
+
+def merge_evidence(extracted: List[ExtractedEvidence]) -> Dict[str, Any]:
+    """
+    Merges extracted evidence into the pipeline state keys, with per-source markers.
+
+    Text evidence for one state key is capped at MAX_EVIDENCE_CHARS; sources past
+    the cap are truncated and marked in both the text and their `note`.
+
+    Returns:
+        Initial state values for textual, audio and video evidence, plus the
+        uploaded videos the video agent attaches to its request.
+    """
+    state: Dict[str, Any] = {TEXTUAL_EVIDENCE: "", AUDIO_EVIDENCE: "", VIDEO_EVIDENCE: "", VIDEO_EVIDENCE_FILES: []}
+    by_route: Dict[str, List[ExtractedEvidence]] = {}
+    for evidence in extracted:
+        if evidence.route is not None:
+            by_route.setdefault(evidence.route, []).append(evidence)
+
+    for route, items in by_route.items():
+        if route == VIDEO_EVIDENCE:
+            state[route] = "\n".join(f"{item.source.name}: {item.content}" for item in items)
+            state[VIDEO_EVIDENCE_FILES] = [
+                {"name": item.source.name, "uri": item.content, "mime_type": item.mime_type} for item in items
+            ]
+            continue
+
+        parts, remaining = [], settings.MAX_EVIDENCE_CHARS
+        for index, item in enumerate(items, start=1):
+            content = item.content
+            if remaining <= 0:
+                item.note = (item.note + " " if item.note else "") + "Skipped: the evidence size limit was reached."
+                continue
+            if len(content) > remaining:
+                content = content[:remaining]
+                item.note = (item.note + " " if item.note else "") + (
+                    f"Truncated to {remaining:,} of {item.chars:,} characters (evidence size limit)."
+                )
+            remaining -= len(content)
+            parts.append(
+                f"=== SOURCE {index}/{len(items)}: {item.source.name} "
+                f"({item.kind}, {len(content):,} characters) ===\n"
+                f"{content.strip()}\n"
+                f"=== END SOURCE: {item.source.name} ==="
+            )
+        state[route] = "\n\n".join(parts)
+    return state
+
+
+def evidence_hash(sources: List[EvidenceSource]) -> str:
+    """Order-independent hash of the evidence pack, recorded with the report."""
+    file_hashes = sorted(hash_file(source.path) for source in sources)
+    return hashlib.sha256("".join(file_hashes).encode("utf-8")).hexdigest()
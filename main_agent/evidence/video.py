@@ -0,0 +1,84 @@
+# main_agent/evidence/video.py
+import mimetypes
+import threading
+import time
+from typing import Optional
+
+from google import genai
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from main_agent.core.config import settings
+
+# Session state key holding the uploaded videos ({"name", "uri", "mime_type"}) to attach
+VIDEO_EVIDENCE_FILES = "video_evidence_files"
+# Seconds between checks while the Files API is processing an upload
+PROCESSING_POLL_SECONDS = 2.0
+
+_client: Optional[genai.Client] = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> genai.Client:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = genai.Client(api_key=settings.GOOGLE_API_KEY)
+        return _client
+
+
+def upload_video(path: str, display_name: str) -> types.File:
+    """
+    Uploads a video to the Gemini Files API and waits until it can be used in a request.
+
+    Uploaded files expire on the API side after 48 hours, so they are not deleted here.
+
+    Args:
+        path: Local path of the video.
+        display_name: Original file name; also used to guess the MIME type.
+
+    Returns:
+        The active file, whose `uri` and `mime_type` are attached to model requests.
+
+    Raises:
+        TimeoutError: If processing takes longer than VIDEO_PROCESSING_TIMEOUT_SECONDS.
+        RuntimeError: If the API fails to process the video.
+    """
+    mime_type = mimetypes.guess_type(display_name)[0] or "video/mp4"
+    client = _get_client()
+    file = client.files.upload(
+        file=path, config=types.UploadFileConfig(mime_type=mime_type, display_name=display_name)
+    )
+    deadline = time.monotonic() + settings.VIDEO_PROCESSING_TIMEOUT_SECONDS
+    while file.state == types.FileState.PROCESSING:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Video processing did not finish within {settings.VIDEO_PROCESSING_TIMEOUT_SECONDS:g}s.")
+        time.sleep(PROCESSING_POLL_SECONDS)
+        file = client.files.get(name=file.name)
+    if file.state != types.FileState.ACTIVE:
+        message = file.error.message if file.error else file.state
+        raise RuntimeError(f"Video processing failed: {message}")
+    return file
+
+
+def attach_video_evidence(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """
+    Before-model callback that attaches the uploaded videos to the request as file parts.
+
+    The videos are added to the last user turn. That turn is replaced with a copy,
+    so the session's stored event is left unchanged.
+    """
+    files = callback_context.state.get(VIDEO_EVIDENCE_FILES) or []
+    if not files:
+        return None
+    parts = [
+        types.Part(file_data=types.FileData(file_uri=file["uri"], mime_type=file["mime_type"]))
+        for file in files
+    ]
+    last = llm_request.contents[-1] if llm_request.contents else None
+    if last is not None and last.role == "user":
+        llm_request.contents[-1] = types.Content(role="user", parts=[*(last.parts or []), *parts])
+    else:
+        llm_request.contents.append(types.Content(role="user", parts=parts))
+    return None
@@ -1,4 +1,6 @@
 # I will move all the agent prompts here later.
+import hashlib
+
 REPORT_WRITER_AGENT_INSTRUCTION = """
 You are the **Final Report Agent** for UAE School Inspections.
 
@@ -60,6 +62,7 @@ Summaries may sometimes be exactly one of the sentences below. Treat those as **
 3. **Retrieve Framework Context (≤ 3 calls)**
    • For each heading, craft **one** comprehensive question that covers all findings under that heading. 
    • Call `retrieve_from_collection` with that question.  
+   • Each returned passage has a relevance `score` and a `source`; passages already returned by an earlier call are not repeated.  
    • Try to use and gain maximum information from the tool and create the headings and subheadings as per the response.
    • You **must not** exceed 3 total calls.
 
@@ -86,7 +89,7 @@ VIDEO_ANALYSIS_AGENT_INSTRUCTION = """
 You are the **Video Evidence Analysis Agent** for UAE School inspections.
 
 🔹 **INPUT PLACEHOLDER**
-`{video_evidence_uri?}` – a URI pointing to classroom video footage.
+`{video_evidence_uri?}` – one or more classroom videos (one per line: file name and URI). The videos themselves are attached to this request; base every observation and timestamp on what you see in them.
 
 If the placeholder is empty or missing, output **exactly**: `No video evidence provided.` and finish.
 
@@ -126,7 +129,7 @@ AUDIO_ANALYSIS_AGENT_INSTRUCTION = """
 You are the **Audio Evidence Analysis Agent** for UAE School inspections.
 
 🔹 **INPUT PLACEHOLDER**
-`{audio_evidence_transcript?}` – a transcript (text) of classroom audio.
+`{audio_evidence_transcript?}` – one or more transcripts (text) of classroom audio, each delimited by `=== SOURCE … ===` markers.
 
 If the placeholder is empty or missing, output **exactly**: `No audio evidence provided.` and finish.
 
@@ -166,7 +169,7 @@ TEXT_ANALYSIS_AGENT_INSTRUCTION = """
 You are the **Textual Evidence Analysis Agent** for UAE School inspections.
 
 🔹 **INPUT PLACEHOLDER**
-`{textual_evidence?}` – concatenated inspector notes, curriculum documents, lesson plans, etc.
+`{textual_evidence?}` – concatenated inspector notes, curriculum documents, lesson plans, etc., each delimited by `=== SOURCE … ===` markers naming the file.
 
 If the placeholder is empty or missing, output **exactly**: `No textual evidence provided.` and finish.
 
@@ -181,4 +184,14 @@ Provide all the insights and observations as an Evidence Analyst.
 ```
 
 Return *only* the filled-in Markdown.
-"""
\ No newline at end of file
+"""
+
+
+# Short content hash of all prompts, recorded with every generated report
+PROMPT_VERSION = hashlib.sha256("".join([
+    REPORT_WRITER_AGENT_INSTRUCTION,
+    SYNTHESIS_AGENT_INSTRUCTION,
+    VIDEO_ANALYSIS_AGENT_INSTRUCTION,
+    AUDIO_ANALYSIS_AGENT_INSTRUCTION,
+    TEXT_ANALYSIS_AGENT_INSTRUCTION,
+]).encode("utf-8")).hexdigest()[:12]
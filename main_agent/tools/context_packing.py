@@ -0,0 +1,220 @@
+# main_agent/tools/context_packing.py
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from llama_index.core.schema import NodeWithScore
+
+from main_agent.core.quota import CHARS_PER_TOKEN, estimate_tokens
+
+# Shortest shared suffix/prefix (in characters) treated as chunk overlap
+MIN_TEXT_OVERLAP = 20
+# Longest suffix/prefix searched for overlap; SentenceSplitter overlaps are much smaller
+MAX_TEXT_OVERLAP = 600
+# Passages are not truncated below this many tokens; they are dropped instead
+MIN_TRUNCATED_TOKENS = 64
+
+
+@dataclass
+class Passage:
+    """A retrieved passage, possibly merged from several adjacent chunks."""
+    text: str
+    score: Optional[float]
+    source: str
+    metadata: Dict[str, Any]
+    start: Optional[int] = None
+    end: Optional[int] = None
+    chunk_hashes: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "score": round(self.score, 4) if self.score is not None else None,
+            "source": self.source,
+            "metadata": self.metadata,
+        }
+
+
+def text_hash(text: str) -> str:
+    """Hash of the whitespace- and case-normalized text, used for duplicate detection."""
+    normalized = re.sub(r"\s+", " ", text).strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _text_overlap(left: str, right: str, min_size: int = MIN_TEXT_OVERLAP) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`."""
+    longest = min(len(left), len(right), MAX_TEXT_OVERLAP)
+    for size in range(longest, min_size - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def passages_from_nodes(nodes: Iterable[NodeWithScore]) -> List[Passage]:
+    """Converts retriever results into passages carrying score and source metadata."""
+    passages = []
+    for node_with_score in nodes:
+        node = node_with_score.node
+        metadata = dict(node.metadata or {})
+        source = metadata.get("file_name") or node.ref_doc_id or node.node_id
+        passages.append(Passage(
+            text=node.get_content(),
+            score=node_with_score.score,
+            source=source,
+            metadata=metadata,
+            start=getattr(node, "start_char_idx", None),
+            end=getattr(node, "end_char_idx", None),
+            chunk_hashes=[text_hash(node.get_content())],
+        ))
+    return passages
+
+
+def _merge_pair(first: Passage, second: Passage, max_gap: int) -> Optional[Passage]:
+    """Merges `second` into `first` if they overlap or are adjacent; returns None otherwise."""
+    if first.chunk_hashes == second.chunk_hashes:
+        merged_text = first.text
+    elif first.start is not None and second.start is not None and first.end is not None:
+        if second.start > first.end + max_gap:
+            return None
+        if second.end is not None and second.end <= first.end:
+            merged_text = first.text
+        else:
+            # Chunk text may be rebuilt from the source (joined, stripped), so the
+            # offsets only say whether chunks overlap; the overlap is found in the text
+            overlap = _text_overlap(first.text, second.text, min_size=1) if second.start < first.end else 0
+            merged_text = first.text + ("\n\n" if overlap == 0 else "") + second.text[overlap:]
+    else:
+        overlap = _text_overlap(first.text, second.text)
+        if not overlap:
+            return None
+        merged_text = first.text + second.text[overlap:]
+
+    scores = [s for s in (first.score, second.score) if s is not None]
+    ends = [e for e in (first.end, second.end) if e is not None]
+    metadata = first.metadata
+    if second.metadata.get("chunk_type") == "descriptor":
+        # A passage containing a descriptor block must not be cut either
+        metadata = {**metadata, "chunk_type": "descriptor"}
+    return Passage(
+        text=merged_text,
+        score=max(scores) if scores else None,
+        source=first.source,
+        metadata=metadata,
+        start=first.start,
+        end=max(ends) if ends else None,
+        chunk_hashes=first.chunk_hashes + [h for h in second.chunk_hashes if h not in first.chunk_hashes],
+    )
+
+
+def merge_overlapping(passages: List[Passage], max_gap: int = 0) -> List[Passage]:
+    """
+    Merges overlapping or adjacent chunks that come from the same source.
+
+    Chunks with character offsets are merged by offset; chunks without offsets
+    are merged when the end of one repeats the start of the other (the
+    splitter's chunk overlap).
+    """
+    by_source: Dict[str, List[Passage]] = {}
+    for passage in passages:
+        by_source.setdefault(passage.source, []).append(passage)
+
+    merged: List[Passage] = []
+    for group in by_source.values():
+        group.sort(key=lambda p: p.start if p.start is not None else -1)
+        current = group[0]
+        for passage in group[1:]:
+            combined = _merge_pair(current, passage, max_gap)
+            if combined is None and passage.start is None:
+                # Without offsets the chunk order is unknown, so try both directions
+                combined = _merge_pair(passage, current, max_gap)
+            if combined is None:
+                merged.append(current)
+                current = passage
+            else:
+                current = combined
+        merged.append(current)
+    return merged
+
+
+def drop_seen(passages: List[Passage], seen_hashes: Set[str]) -> Tuple[List[Passage], int]:
+    """
+    Drops passages whose chunks were all returned before (earlier in the session or in this batch).
+
+    Returns:
+        The remaining passages and the number of passages dropped.
+    """
+    seen = set(seen_hashes)
+    kept, dropped = [], 0
+    for passage in passages:
+        if all(h in seen for h in passage.chunk_hashes):
+            dropped += 1
+            continue
+        seen.update(passage.chunk_hashes)
+        kept.append(passage)
+    return kept, dropped
+
+
+def chunk_token_budget(chunk_count: int, max_chunk_chars: int) -> int:
+    """Estimated tokens needed to return `chunk_count` chunks of the largest size whole."""
+    return chunk_count * estimate_tokens("x" * max_chunk_chars)
+
+
+def fit_to_budget(passages: List[Passage], token_budget: int) -> List[Passage]:
+    """
+    Keeps the highest-scoring passages that fit into `token_budget` estimated tokens.
+
+    Passages that do not fit are skipped in favour of lower-ranked ones that
+    still do. Descriptor blocks are only skipped: a cut would drop some of the
+    performance levels. Other passages are cut at a whitespace boundary
+    instead, if enough budget remains for the cut to be useful.
+    """
+    ranked = sorted(passages, key=lambda p: p.score if p.score is not None else float("-inf"), reverse=True)
+    packed, remaining = [], token_budget
+    for passage in ranked:
+        tokens = estimate_tokens(passage.text)
+        if tokens <= remaining:
+            packed.append(passage)
+            remaining -= tokens
+            continue
+        if passage.metadata.get("chunk_type") != "descriptor" and remaining >= MIN_TRUNCATED_TOKENS:
+            cut = passage.text[:remaining * CHARS_PER_TOKEN].rsplit(None, 1)[0]
+            packed.append(Passage(
+                text=cut + " …",
+                score=passage.score,
+                source=passage.source,
+                metadata={**passage.metadata, "truncated": True},
+                start=passage.start,
+                end=passage.end,
+                chunk_hashes=passage.chunk_hashes,
+            ))
+            break
+    return packed
+
+
+def pack_context(
+    nodes: Iterable[NodeWithScore],
+    seen_hashes: Set[str],
+    token_budget: int,
+    max_gap: int = 0,
+) -> Tuple[List[Passage], int]:
+    """
+    Post-retrieval packing: merge overlapping chunks, drop repeats and fit the token budget.
+
+    Args:
+        nodes: Retriever results.
+        seen_hashes: Chunk hashes already returned in this session; updated in place.
+        token_budget: Maximum estimated tokens of the returned passages.
+        max_gap: Largest character gap between chunks of a source that still merges them.
+
+    Returns:
+        The packed passages, best first, and the number of duplicate passages dropped.
+    """
+    passages = merge_overlapping(passages_from_nodes(nodes), max_gap=max_gap)
+    passages, dropped = drop_seen(passages, seen_hashes)
+    packed = fit_to_budget(passages, token_budget)
+    # Truncated passages stay retrievable in full by a later question
+    for passage in packed:
+        if not passage.metadata.get("truncated"):
+            seen_hashes.update(passage.chunk_hashes)
+    return packed, dropped
@@ -1,100 +1,118 @@
 # main_agent/tools/pdf_generator.py
-import os
 import markdown
 from xhtml2pdf import pisa
-from datetime import datetime
-from typing import Dict
+from google.adk.tools import ToolContext
+from typing import Dict, Union
+from main_agent.core.config import settings
+from main_agent.core.report_store import get_report_store
+from main_agent.prompts.instructions import PROMPT_VERSION
 
-# Define the output directory for reports
-OUTPUT_DIR = "output_reports"
 
-def create_pdf_report(report_markdown_content: str) -> Dict[str, str]:
+class PdfRenderError(RuntimeError):
+    """Raised when xhtml2pdf reports an error while rendering a report."""
+
+
+def render_pdf(report_markdown_content: str, file_path: str) -> None:
     """
-    Converts a given Markdown formatted report into a styled PDF file.
+    Renders Markdown as a styled PDF at `file_path`.
 
-    The tool first converts the Markdown to HTML, adds basic styling for a
-    professional look, and then renders it as a PDF. The PDF is saved
-    locally in the 'output_reports' directory with a unique timestamped name.
+    The Markdown is converted to HTML and basic styling is added for a
+    professional look before it is rendered.
 
-    Args:
-        report_markdown_content: A string containing the full report in Markdown format.
+    Raises:
+        PdfRenderError: If the PDF could not be rendered.
+    """
+    # Convert Markdown to HTML
+    html_content = markdown.markdown(report_markdown_content)
 
-    Returns:
-        A dictionary containing the path to the generated PDF file.
-        e.g., {"pdf_file_path": "output_reports/Inspection_Report_20240727_153000.pdf"}
+    # Add some basic CSS for styling
+    styled_html = f"""
+    <html>
+    <head>
+        <style>
+            @page {{
+                size: a4 portrait;
+                @frame content_frame {{
+                    left: 50pt; right: 50pt; top: 50pt; bottom: 50pt;
+                }}
+            }}
+            body {{
+                font-family: 'Helvetica', 'Arial', sans-serif;
+                font-size: 11pt;
+                line-height: 1.5;
+            }}
+            h1 {{
+                font-size: 24pt;
+                color: #333;
+                border-bottom: 2px solid #ccc;
+                padding-bottom: 10px;
+                margin-bottom: 20px;
+            }}
+            h2 {{
+                font-size: 18pt;
+                color: #444;
+                margin-top: 25px;
+                border-bottom: 1px solid #eee;
+                padding-bottom: 5px;
+            }}
+            h3 {{
+                font-size: 14pt;
+                color: #555;
+            }}
+            p {{
+                margin-bottom: 12px;
+            }}
+            ul {{
+                padding-left: 20pt;
+            }}
+            li {{
+                margin-bottom: 8px;
+            }}
+        </style>
+    </head>
+    <body>
+        {html_content}
+    </body>
+    </html>
     """
-    try:
-        # Ensure the output directory exists
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-        # Convert Markdown to HTML
-        html_content = markdown.markdown(report_markdown_content)
+    # Create the PDF
+    with open(file_path, "wb") as pdf_file:
+        pisa_status = pisa.CreatePDF(styled_html, dest=pdf_file)
 
-        # Add some basic CSS for styling
-        styled_html = f"""
-        <html>
-        <head>
-            <style>
-                @page {{
-                    size: a4 portrait;
-                    @frame content_frame {{
-                        left: 50pt; right: 50pt; top: 50pt; bottom: 50pt;
-                    }}
-                }}
-                body {{
-                    font-family: 'Helvetica', 'Arial', sans-serif;
-                    font-size: 11pt;
-                    line-height: 1.5;
-                }}
-                h1 {{
-                    font-size: 24pt;
-                    color: #333;
-                    border-bottom: 2px solid #ccc;
-                    padding-bottom: 10px;
-                    margin-bottom: 20px;
-                }}
-                h2 {{
-                    font-size: 18pt;
-                    color: #444;
-                    margin-top: 25px;
-                    border-bottom: 1px solid #eee;
-                    padding-bottom: 5px;
-                }}
-                h3 {{
-                    font-size: 14pt;
-                    color: #555;
-                }}
-                p {{
-                    margin-bottom: 12px;
-                }}
-                ul {{
-                    padding-left: 20pt;
-                }}
-                li {{
-                    margin-bottom: 8px;
-                }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
+    if pisa_status.err:
+        raise PdfRenderError(f"PDF generation failed with error code {pisa_status.err}")
 
-        # Generate a unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_name = f"Inspection_Report_{timestamp}.pdf"
-        file_path = os.path.join(OUTPUT_DIR, file_name)
 
-        # Create the PDF
-        with open(file_path, "wb") as pdf_file:
-            pisa_status = pisa.CreatePDF(styled_html, dest=pdf_file)
+def create_pdf_report(report_markdown_content: str, tool_context: ToolContext) -> Dict[str, Union[str, int, bool]]:
+    """
+    Converts a given Markdown formatted report into a styled PDF file.
 
-        if pisa_status.err:
-            error_message = f"PDF generation failed with error code {pisa_status.err}"
-            return {"error": error_message}
+    The PDF is stored in the report store (the 'output_reports' directory with
+    an SQLite index). If an identical report was generated before, the stored
+    PDF is reused instead of rendering a duplicate.
 
-        return {"pdf_file_path": file_path}
+    Args:
+        report_markdown_content: A string containing the full report in Markdown format.
+
+    Returns:
+        A dictionary containing the path to the generated PDF file.
+        e.g., {"pdf_file_path": "output_reports/Inspection_Report_20240727_153000_1a2b3c4d_5e6f70.pdf"}
+    """
+    try:
+        state = tool_context.state
+        record, created = get_report_store().save_report(
+            report_markdown_content,
+            render=render_pdf,
+            session_id=state.get("session_id", ""),
+            school_id=state.get("school_id", ""),
+            evidence_hash=state.get("evidence_hash", ""),
+            model_version=settings.TEXT_MODEL,
+            prompt_version=PROMPT_VERSION,
+        )
+        return {"pdf_file_path": record.pdf_path, "report_id": record.report_id, "deduplicated": not created}
 
+    except PdfRenderError as e:
+        return {"error": str(e)}
     except Exception as e:
-        return {"error": f"An unexpected error occurred during PDF generation: {str(e)}"}
\ No newline at end of file
+        return {"error": f"An unexpected error occurred during PDF generation: {str(e)}"}
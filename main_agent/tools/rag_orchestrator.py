@@ -1,16 +1,26 @@
 from qdrant_client import AsyncQdrantClient
-from llama_index.core import VectorStoreIndex
+from llama_index.core import QueryBundle, VectorStoreIndex
+from llama_index.core.base.embeddings.base import BaseEmbedding
 from llama_index.core.retrievers import VectorIndexRetriever
 from llama_index.vector_stores.qdrant import QdrantVectorStore
 from llama_index.embeddings.google_genai import GoogleGenAIEmbedding
-from typing import Dict, List
+from google.adk.tools import ToolContext
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Set
 import logging
 from main_agent.core.config import settings
+from main_agent.core.quota import estimate_tokens, get_scheduler, priority_for
+from main_agent.core.resilience import get_caller, retrieval_policy
+from main_agent.tools.context_packing import chunk_token_budget, pack_context
+
+# Session state key holding hashes of chunks already returned to the agent
+SEEN_PASSAGES_STATE_KEY = "retrieved_passage_hashes"
+
 
 class QdrantRAGTool:
     """
     A tool to retrieve documents from a Qdrant vector database using LlamaIndex.
-    Returns raw retrieved documents without LLM processing.
+    Returns packed passages (merged, deduplicated and budgeted) without LLM processing.
     """
     def __init__(self):
         """
@@ -27,55 +37,107 @@ class QdrantRAGTool:
             collection_name=settings.QDRANT_COLLECTION_NAME,
         )
         
+        # Queries are embedded before retrieval, so the embedding request is admitted
+        # by the quota scheduler and never duplicated by a retried or hedged Qdrant query
+        self.embed_model: BaseEmbedding = GoogleGenAIEmbedding(model_name="text-embedding-004")
+
         # Load the index from the existing vector store
         index = VectorStoreIndex.from_vector_store(
             vector_store,
-            embed_model=GoogleGenAIEmbedding(model_name="text-embedding-004")
+            embed_model=self.embed_model
         )
 
         self.retriever = VectorIndexRetriever(
             index=index,
-            similarity_top_k=2,
+            similarity_top_k=settings.RETRIEVAL_TOP_K,
+        )
+
+        # Deadline, retries, hedging and circuit breaking for Qdrant I/O
+        self.caller = get_caller("retrieval", retrieval_policy())
+        # Embedding requests are not hedged: a duplicate would spend a second quota grant
+        self.embed_caller = get_caller("embedding", replace(retrieval_policy(), hedge=False))
+
+    async def embed_query(self, question: str) -> List[float]:
+        """Embeds a query through the quota scheduler and the embedding `ResilientCaller`."""
+        scheduler = get_scheduler()
+        ticket = scheduler.new_ticket()
+        model_name = getattr(self.embed_model, "model_name", "embedding")
+        return await self.embed_caller.call(
+            lambda: self.embed_model.aget_query_embedding(question),
+            admit=lambda: scheduler.acquire(
+                model_name, estimate_tokens(question), priority_for("retrieval"), ticket=ticket
+            ),
         )
             
-    async def retrieve_documents(self, question: str) -> Dict[str, List[str]]:
+    async def retrieve_documents(
+        self, question: str, seen_hashes: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
         """
         Asynchronously retrieves relevant documents from the knowledge base.
-        Includes basic error handling for network issues.
+        The query embedding and the Qdrant query go through their own
+        `ResilientCaller`, so slow or failing requests are retried (Qdrant
+        queries also hedged) and fail fast while the backend is down.
+
+        Retrieved chunks are packed before they are returned: overlapping chunks
+        of a source are merged, chunks in `seen_hashes` are dropped and the
+        result is fitted to RETRIEVAL_TOKEN_BUDGET (by default, room for
+        RETRIEVAL_TOP_K chunks of the largest size, so whole descriptor blocks fit).
 
         Args:
             question: The question to search for in the knowledge base.
+            seen_hashes: Hashes of chunks already returned in this session;
+                updated in place with the newly returned chunks.
 
         Returns:
-            A dictionary containing the list of retrieved document contents,
-            or an error message if retrieval fails.
+            A dictionary containing the list of passages (text, score, source
+            and metadata), or an error message if retrieval fails.
         """
         try:
             logging.info(f"Retrieving documents for question: {question[:50]}...")
-            nodes = await self.retriever.aretrieve(question)
-            retrieved_texts = [node.text for node in nodes]
-            logging.info(f"Successfully retrieved {len(retrieved_texts)} documents.")
-            return {"retrieved_documents": retrieved_texts}
+            query = QueryBundle(question, embedding=await self.embed_query(question))
+            nodes = await self.caller.call(lambda: self.retriever.aretrieve(query))
+            passages, dropped = pack_context(
+                nodes,
+                seen_hashes if seen_hashes is not None else set(),
+                token_budget=settings.RETRIEVAL_TOKEN_BUDGET or chunk_token_budget(
+                    settings.RETRIEVAL_TOP_K, settings.RETRIEVAL_MAX_CHUNK_CHARS
+                ),
+                max_gap=settings.RETRIEVAL_MERGE_GAP_CHARS,
+            )
+            logging.info(
+                f"Retrieved {len(nodes)} chunks; returning {len(passages)} passages "
+                f"({dropped} already returned earlier)."
+            )
+            return {
+                "retrieved_documents": [passage.to_dict() for passage in passages],
+                "duplicates_omitted": dropped,
+            }
         except Exception as e:
             # Catch potential exceptions (like timeouts) and return a structured error
             # that the agent can understand.
             error_message = f"Failed to retrieve documents from the knowledge base. Error: {str(e)}"
             logging.error(error_message)
-            return {"retrieved_documents": [f"Error: {error_message}"]}
+            return {"retrieved_documents": [], "error": error_message}
 
 
 # Create a single instance of the RAG tool to be used by the agent
 rag_tool_instance = QdrantRAGTool()
 
-async def retrieve_from_collection(question: str) -> Dict[str, List[str]]:
+async def retrieve_from_collection(question: str, tool_context: ToolContext) -> Dict[str, Any]:
     """
     Function to be used as a tool by the agent to retrieve relevant sections from
     the UAE School Inspection Framework documentation.
 
+    Passages already returned earlier in the session are not repeated.
+
     Args:
         question: A specific query or finding to look up in the framework.
 
     Returns:
-        A dictionary containing retrieved document snippets from the framework.
+        A dictionary containing retrieved framework passages, each with its
+        text, relevance score and source.
     """
-    return await rag_tool_instance.retrieve_documents(question) 
\ No newline at end of file
+    seen_hashes = set(tool_context.state.get(SEEN_PASSAGES_STATE_KEY, []))
+    result = await rag_tool_instance.retrieve_documents(question, seen_hashes)
+    tool_context.state[SEEN_PASSAGES_STATE_KEY] = sorted(seen_hashes)
+    return result
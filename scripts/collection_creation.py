@@ -7,18 +7,18 @@ from llama_index.core import (
     VectorStoreIndex,
     StorageContext,
 )
-from llama_index.core.node_parser import SentenceSplitter
 from llama_index.vector_stores.qdrant import QdrantVectorStore
 from llama_index.embeddings.google_genai import GoogleGenAIEmbedding
 from google.genai.types import EmbedContentConfig
 from typing import List
 from dotenv import load_dotenv
+from scripts.markdown_chunking import chunk_documents
 
 load_dotenv()
 
-GOOGLE_API_KEY = os.environ["GOOGLE_API_KEY"]
-QDRANT_URL = os.environ["QDRANT_URL"]
-QDRANT_API_KEY = os.environ["QDRANT_API_KEY"]
+GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
+QDRANT_URL = os.environ.get("QDRANT_URL")
+QDRANT_API_KEY = os.environ.get("QDRANT_API_KEY")
 
 DATA_DIR = "data"
 COLLECTION_NAME = "uae-inspection-framework"
@@ -114,16 +114,16 @@ def main():
     vector_store = QdrantVectorStore(client=client, collection_name=COLLECTION_NAME)
     storage_context = StorageContext.from_defaults(vector_store=vector_store)
     
-    # Define a chunking strategy to avoid overloading the embedding model.
-    node_parser = SentenceSplitter(chunk_size=512, chunk_overlap=20)
+    # Chunk along the Markdown heading and table structure, keeping level descriptors whole.
+    nodes = chunk_documents(documents)
+    print(f"Created {len(nodes)} structure-aware chunks.")
 
-    # Create the index, which automatically embeds and stores the documents
+    # Create the index, which automatically embeds and stores the chunks
     print("Indexing documents... This will take some time due to rate limiting.")
-    index = VectorStoreIndex.from_documents(
-        documents,
+    index = VectorStoreIndex(
+        nodes,
         storage_context=storage_context,
         embed_model=embed_model,
-        node_parser=node_parser,
         show_progress=True,
     )
     print("Indexing complete.")
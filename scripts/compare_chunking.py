@@ -0,0 +1,155 @@
+"""
+Compares the structure-aware chunker with the previous SentenceSplitter baseline.
+
+Both chunkings of the framework PDFs in `data/` are embedded into in-memory
+indexes and queried with a fixed query set. A query is a hit when one of the
+top-k chunks contains all of its expected terms. The report lists chunk counts,
+embedding requests at ingestion, chunk sizes, hit rate and the share of
+top-k slots holding a relevant chunk.
+
+Example:
+    python -m scripts.compare_chunking --output chunking_comparison.json
+"""
+import argparse
+import json
+import statistics
+from typing import Any, Dict, List
+
+from google.genai.types import EmbedContentConfig
+from llama_index.core import VectorStoreIndex
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import BaseNode
+
+from scripts.collection_creation import (
+    DATA_DIR,
+    EMBED_MODEL,
+    EMBEDDING_DIM,
+    RateLimitedGoogleGenAIEmbedding,
+    load_and_parse_pdfs,
+)
+from scripts.markdown_chunking import chunk_documents
+
+SIMILARITY_TOP_K = 2
+
+# Fixed query set: each query lists terms a relevant framework passage must contain
+QUERY_SET: List[Dict[str, Any]] = [
+    {"query": "What are the indicators of students' attainment in Islamic education?", "expect": ["attainment", "islamic education"]},
+    {"query": "How is students' progress in Arabic judged?", "expect": ["progress", "arabic"]},
+    {"query": "What does outstanding teaching for effective learning look like?", "expect": ["teaching", "outstanding"]},
+    {"query": "How should assessment information be used to plan lessons?", "expect": ["assessment", "plan"]},
+    {"query": "What are the expectations for students' personal development and behaviour?", "expect": ["behaviour"]},
+    {"query": "How do schools promote innovation and enterprise?", "expect": ["innovation"]},
+    {"query": "What is expected of curriculum design and implementation?", "expect": ["curriculum", "design"]},
+    {"query": "How are students of determination supported?", "expect": ["determination"]},
+    {"query": "What are the requirements for health, safety and safeguarding?", "expect": ["safeguarding"]},
+    {"query": "How is the effectiveness of leadership evaluated?", "expect": ["leadership"]},
+    {"query": "How does the school work in partnership with parents and the community?", "expect": ["parents", "community"]},
+    {"query": "How are governance and accountability judged?", "expect": ["governance"]},
+    {"query": "What describes weak performance in students' learning skills?", "expect": ["learning skills", "weak"]},
+    {"query": "How should teachers develop students' critical thinking and problem solving?", "expect": ["critical thinking"]},
+    {"query": "How are self-evaluation and improvement planning judged?", "expect": ["self-evaluation", "improvement"]},
+    {"query": "How do students show understanding of Islamic values and Emirati culture?", "expect": ["emirati", "islamic values"]},
+]
+
+
+class CountingEmbedding(RateLimitedGoogleGenAIEmbedding):
+    """Rate-limited embedding model that counts ingestion requests and embedded texts."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._requests = 0
+        self._texts = 0
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        self._requests += 1
+        self._texts += len(texts)
+        return super()._get_text_embeddings(texts)
+
+
+def _is_relevant(text: str, expect: List[str]) -> bool:
+    lowered = text.lower()
+    return all(term.lower() in lowered for term in expect)
+
+
+def evaluate(name: str, nodes: List[BaseNode], queries: List[Dict[str, Any]], delay_seconds: float) -> Dict[str, Any]:
+    """Embeds `nodes`, runs the query set and returns chunking and retrieval metrics."""
+    embed_model = CountingEmbedding(
+        model_name=EMBED_MODEL,
+        delay_seconds=delay_seconds,
+        config=EmbedContentConfig(task_type="retrieval_document", output_dimensionality=EMBEDDING_DIM),
+    )
+    print(f"[{name}] Embedding {len(nodes)} chunks...")
+    index = VectorStoreIndex(nodes, embed_model=embed_model, show_progress=True)
+    ingestion_requests = embed_model._requests
+
+    retriever = index.as_retriever(similarity_top_k=SIMILARITY_TOP_K)
+    hits, relevant_slots, per_query = 0, 0, []
+    for item in queries:
+        results = retriever.retrieve(item["query"])
+        relevant = [_is_relevant(result.node.get_content(), item["expect"]) for result in results]
+        hits += any(relevant)
+        relevant_slots += sum(relevant)
+        per_query.append({
+            "query": item["query"],
+            "hit": any(relevant),
+            "relevant_slots": sum(relevant),
+            "heading_paths": [result.node.metadata.get("heading_path") for result in results],
+        })
+
+    sizes = [len(node.get_content()) for node in nodes]
+    return {
+        "chunk_count": len(nodes),
+        "embedding_requests": ingestion_requests,
+        "chunk_chars": {
+            "mean": round(statistics.mean(sizes), 1) if sizes else None,
+            "median": statistics.median(sizes) if sizes else None,
+            "min": min(sizes, default=None),
+            "max": max(sizes, default=None),
+        },
+        "hit_rate": round(hits / len(queries), 3) if queries else None,
+        "relevant_slot_rate": round(relevant_slots / (len(queries) * SIMILARITY_TOP_K), 3) if queries else None,
+        "queries": per_query,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare structure-aware chunking with the SentenceSplitter baseline.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--queries", default=None, help="JSON file with [{\"query\": ..., \"expect\": [...]}].")
+    parser.add_argument("--delay-seconds", type=float, default=1.0, help="Delay between embedding requests.")
+    parser.add_argument("--output", default="chunking_comparison.json")
+    args = parser.parse_args()
+
+    queries = QUERY_SET
+    if args.queries:
+        with open(args.queries) as f:
+            queries = json.load(f)
+
+    documents = load_and_parse_pdfs(args.data_dir)
+    if not documents:
+        print("No documents were successfully loaded. Exiting.")
+        return
+
+    baseline_nodes = SentenceSplitter(chunk_size=512, chunk_overlap=20).get_nodes_from_documents(documents)
+    structured_nodes = chunk_documents(documents)
+
+    report = {
+        "similarity_top_k": SIMILARITY_TOP_K,
+        "query_count": len(queries),
+        "baseline_sentence_splitter": evaluate("baseline", baseline_nodes, queries, args.delay_seconds),
+        "structure_aware": evaluate("structured", structured_nodes, queries, args.delay_seconds),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name in ("baseline_sentence_splitter", "structure_aware"):
+        result = report[name]
+        print(
+            f"{name}: {result['chunk_count']} chunks, {result['embedding_requests']} embedding requests, "
+            f"hit rate {result['hit_rate']}, relevant slots {result['relevant_slot_rate']}"
+        )
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
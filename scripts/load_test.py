@@ -0,0 +1,456 @@
+"""
+Load-testing harness for concurrent inspections.
+
+Drives `Runner.run_async` for `root_agent` with N simulated users while the
+Gemini models and the Qdrant retriever are replaced by local stubs with
+configurable latency distributions. Concurrency is ramped through the given
+levels and a JSON report with throughput, end-to-end and per-stage latency
+percentiles, event loop lag and session memory growth is written at the end.
+
+Example:
+    python -m scripts.load_test --levels 1,4,16,32 --inspections-per-user 3 \
+        --model-latency lognormal:2.0,0.5 --retrieval-latency uniform:0.05,0.3 \
+        --evidence-pdf "temp_data/Uae School Plan 2025.pdf" --output load_report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+# The real clients are constructed at import time; they only need placeholder credentials
+os.environ.setdefault("GOOGLE_API_KEY", "load-test-placeholder")
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from llama_index.core import MockEmbedding
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+
+from main_agent.agent import root_agent
+from main_agent.core import quota
+from main_agent.core.config import settings
+from main_agent.evidence.pdf_extraction import extract_pdf_markdown
+from main_agent.tools import rag_orchestrator
+from main_agent.tools.rag_orchestrator import SEEN_PASSAGES_STATE_KEY
+
+APP_NAME = "school_inspection_load_test"
+# Model name all stubbed agents share in the quota scheduler
+STUB_MODEL = "stub-model"
+
+# Arguments the stub model passes when it calls a tool
+STUB_TOOL_ARGS: Dict[str, Dict[str, Any]] = {
+    "retrieve_from_collection": {"question": "What are the descriptors for outstanding teaching and assessment?"},
+    "get_current_date": {},
+    "create_pdf_report": {
+        "report_markdown_content": "# Inspection Report\n\n## Teaching and assessment\n\n"
+        + "Lessons were well planned and students were engaged. " * 40
+    },
+}
+
+
+class LatencyDistribution:
+    """
+    Samples latencies (seconds) from a distribution given as "<kind>:<params>".
+
+    Supported kinds: "const:<s>", "uniform:<low>,<high>", "exp:<mean>" and
+    "lognormal:<median>,<sigma>".
+    """
+    def __init__(self, spec: str, rng: random.Random):
+        self.spec = spec
+        self.kind, _, params = spec.partition(":")
+        self.params = [float(p) for p in params.split(",") if p]
+        self._rng = rng
+        if self.kind not in ("const", "uniform", "exp", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        if self.kind == "const":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self._rng.uniform(self.params[0], self.params[1])
+        if self.kind == "exp":
+            return self._rng.expovariate(1 / self.params[0])
+        median, sigma = self.params
+        return median * self._rng.lognormvariate(0, sigma)
+
+
+class Recorder:
+    """Collects latency samples per stage for the current concurrency level."""
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._started: Dict[Any, float] = {}
+        self.in_flight_model_calls = 0
+        self.max_in_flight_model_calls = 0
+
+    def reset(self) -> None:
+        self.samples = {}
+        self._started = {}
+        self.max_in_flight_model_calls = 0
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def start(self, key: Any) -> None:
+        self._started[key] = time.perf_counter()
+
+    def stop(self, key: Any, stage: str) -> None:
+        started = self._started.pop(key, None)
+        if started is not None:
+            self.add(stage, time.perf_counter() - started)
+
+
+recorder = Recorder()
+
+
+class StubLlm(BaseLlm):
+    """
+    Stand-in for Gemini that sleeps for a sampled latency and answers locally.
+
+    If the agent has tools, the stub first calls each tool once (in the order
+    the agent declares them) and then returns a final text answer, so tool
+    execution (retrieval, PDF rendering) is exercised like in a real run.
+    A semaphore emulates the provider's concurrency limit. With `use_quota`,
+    calls are first admitted by the shared quota scheduler at the agent's
+    priority, like ResilientGemini does.
+    """
+    latency: Any
+    limit: Any
+    response_chars: int = 2000
+    agent_name: str = ""
+    use_quota: bool = False
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        queued = time.perf_counter()
+        if self.use_quota:
+            await quota.get_scheduler().acquire(
+                STUB_MODEL, settings.QUOTA_OUTPUT_TOKEN_ESTIMATE, quota.priority_for(self.agent_name)
+            )
+            recorder.add("quota_wait", time.perf_counter() - queued)
+        async with self.limit:
+            recorder.add("model_queue_wait", time.perf_counter() - queued)
+            recorder.in_flight_model_calls += 1
+            recorder.max_in_flight_model_calls = max(
+                recorder.max_in_flight_model_calls, recorder.in_flight_model_calls
+            )
+            try:
+                delay = self.latency.sample()
+                await asyncio.sleep(delay)
+                recorder.add("model_call", delay)
+            finally:
+                recorder.in_flight_model_calls -= 1
+
+        answered = {
+            part.function_response.name
+            for content in llm_request.contents or []
+            for part in content.parts or []
+            if part.function_response
+        }
+        for tool_name in llm_request.tools_dict:
+            if tool_name not in answered:
+                args = dict(STUB_TOOL_ARGS.get(tool_name, {}))
+                if tool_name == "create_pdf_report":
+                    # Unique content, otherwise the report store deduplicates every render after the first
+                    args["report_markdown_content"] += f"\n\nReference: {uuid.uuid4().hex}\n"
+                yield LlmResponse(content=types.Content(role="model", parts=[
+                    types.Part(function_call=types.FunctionCall(name=tool_name, args=args))
+                ]))
+                return
+
+        text = ("Stub analysis of the provided evidence. " * (self.response_chars // 40 + 1))[:self.response_chars]
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+class StubRetriever:
+    """Stand-in for the Qdrant retriever returning canned framework chunks after a sampled latency."""
+    def __init__(self, latency: LatencyDistribution, top_k: int):
+        self.latency = latency
+        self.top_k = top_k
+
+    async def aretrieve(self, query: QueryBundle) -> List[NodeWithScore]:
+        delay = self.latency.sample()
+        await asyncio.sleep(delay)
+        recorder.add("retrieval_backend", delay)
+        return [
+            NodeWithScore(
+                node=TextNode(
+                    text=f"Performance standard {i}: descriptors for outstanding, very good and good levels. " * 12,
+                    metadata={"file_name": "framework.pdf"},
+                    start_char_idx=i * 2000,
+                    end_char_idx=i * 2000 + 1000,
+                ),
+                score=0.9 - i * 0.05,
+            )
+            for i in range(self.top_k)
+        ]
+
+
+def _iter_agents(agent: BaseAgent):
+    yield agent
+    for sub_agent in agent.sub_agents:
+        yield from _iter_agents(sub_agent)
+
+
+def install_stubs(args: argparse.Namespace, rng: random.Random) -> None:
+    """Swaps models and the retriever for stubs and attaches timing callbacks to every agent."""
+    model_latency = LatencyDistribution(args.model_latency, rng)
+    model_limit = asyncio.Semaphore(args.model_concurrency)
+    if args.quota_rpm:
+        settings.QUOTA_MODEL_LIMITS = {STUB_MODEL: {"rpm": args.quota_rpm, "tpm": 10 ** 12}}
+        quota._scheduler = None
+
+    def before_agent(callback_context):
+        recorder.start((callback_context.invocation_id, callback_context.agent_name))
+
+    def after_agent(callback_context):
+        recorder.stop((callback_context.invocation_id, callback_context.agent_name),
+                      f"agent:{callback_context.agent_name}")
+
+    def before_tool(tool, args, tool_context):
+        recorder.start((tool_context.invocation_id, tool_context.function_call_id))
+
+    def after_tool(tool, args, tool_context, tool_response):
+        recorder.stop((tool_context.invocation_id, tool_context.function_call_id), f"tool:{tool.name}")
+
+    for agent in _iter_agents(root_agent):
+        agent.before_agent_callback = before_agent
+        agent.after_agent_callback = after_agent
+        if isinstance(agent, LlmAgent):
+            agent.model = StubLlm(
+                model=f"stub-{agent.name}",
+                latency=model_latency,
+                limit=model_limit,
+                response_chars=args.response_chars,
+                agent_name=agent.name,
+                use_quota=bool(args.quota_rpm),
+            )
+            agent.before_tool_callback = before_tool
+            agent.after_tool_callback = after_tool
+
+    rag_orchestrator.rag_tool_instance.embed_model = MockEmbedding(embed_dim=8)
+    rag_orchestrator.rag_tool_instance.retriever = StubRetriever(
+        LatencyDistribution(args.retrieval_latency, rng), top_k=args.retrieval_top_k
+    )
+    # Reports go to a throwaway store so the real report index is untouched
+    settings.PDF_DATA_DIR = tempfile.mkdtemp(prefix="load_test_reports_")
+
+
+async def run_inspection(runner: Runner, user_id: str, evidence_pdf: Optional[str]) -> float:
+    """Runs one inspection end to end and returns its latency in seconds."""
+    started = time.perf_counter()
+    if evidence_pdf:
+        extraction_started = time.perf_counter()
+        textual_evidence, _ = await asyncio.to_thread(extract_pdf_markdown, evidence_pdf)
+        recorder.add("extraction", time.perf_counter() - extraction_started)
+    else:
+        textual_evidence = "Lesson plan and observation notes. " * 200
+
+    session_id = str(uuid.uuid4())
+    await runner.session_service.create_session(
+        app_name=APP_NAME, user_id=user_id, session_id=session_id, state={}
+    )
+    events = runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=types.Content(
+            role="user",
+            parts=[types.Part(text="Start the inspection process for the provided evidence.")],
+        ),
+        state_delta={
+            "textual_evidence": textual_evidence,
+            "video_evidence_uri": "",
+            "audio_evidence_transcript": "",
+            "session_id": session_id,
+            SEEN_PASSAGES_STATE_KEY: [],
+        },
+    )
+    async for event in events:
+        if event.error_code:
+            raise RuntimeError(f"{event.author}: {event.error_code} {event.error_message}")
+    return time.perf_counter() - started
+
+
+async def monitor_event_loop(samples: List[float], stop: asyncio.Event, interval: float = 0.05) -> None:
+    """Records how late the event loop wakes up; sustained lag means the loop is saturated."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))], 4)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "p50": pick(50),
+        "p95": pick(95),
+        "p99": pick(99),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def session_stats(session_service: InMemorySessionService) -> Dict[str, int]:
+    sessions = [
+        session
+        for users in session_service.sessions.values()
+        for user_sessions in users.values()
+        for session in user_sessions.values()
+    ]
+    return {"sessions": len(sessions), "events": sum(len(s.events) for s in sessions)}
+
+
+async def run_level(runner: Runner, concurrency: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Runs `concurrency` simulated users, each doing `inspections_per_user` inspections back to back."""
+    recorder.reset()
+    memory_before, _ = tracemalloc.get_traced_memory()
+    end_to_end: List[float] = []
+    failures: List[str] = []
+
+    async def user(index: int) -> None:
+        for _ in range(args.inspections_per_user):
+            try:
+                end_to_end.append(await run_inspection(runner, f"load_user_{index}", args.evidence_pdf))
+            except Exception as e:
+                failures.append(str(e))
+
+    lag: List[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_event_loop(lag, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+    return {
+        "concurrency": concurrency,
+        "completed": len(end_to_end),
+        "failed": len(failures),
+        "errors": sorted(set(failures))[:5],
+        "wall_seconds": round(wall, 3),
+        "throughput_per_minute": round(len(end_to_end) / wall * 60, 2) if wall else None,
+        "end_to_end": percentiles(end_to_end),
+        "stages": {stage: percentiles(samples) for stage, samples in sorted(recorder.samples.items())},
+        "event_loop_lag": percentiles(lag),
+        "max_concurrent_model_calls": recorder.max_in_flight_model_calls,
+        "memory": {
+            "traced_mb": round(memory_after / 1024 / 1024, 2),
+            "traced_growth_mb": round((memory_after - memory_before) / 1024 / 1024, 2),
+            "traced_peak_mb": round(memory_peak / 1024 / 1024, 2),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+            **session_stats(runner.session_service),
+        },
+    }
+
+
+def find_saturation(levels: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Finds the first level where raising concurrency stops raising throughput and
+    names the stage whose p95 grew the most relative to the first level.
+    """
+    for previous, current in zip(levels, levels[1:]):
+        if not previous["throughput_per_minute"] or not current["throughput_per_minute"]:
+            continue
+        gain = current["throughput_per_minute"] / previous["throughput_per_minute"]
+        scale = current["concurrency"] / previous["concurrency"]
+        if gain < 1 + 0.5 * (scale - 1):
+            growth = {}
+            for stage, stats in current["stages"].items():
+                baseline = levels[0]["stages"].get(stage, {}).get("p95")
+                if baseline and stats["p95"] is not None:
+                    growth[stage] = round(stats["p95"] / baseline, 2)
+            return {
+                "saturated_at_concurrency": current["concurrency"],
+                "throughput_gain": round(gain, 2),
+                "event_loop_lag_p99": current["event_loop_lag"]["p99"],
+                "stage_p95_growth": dict(sorted(growth.items(), key=lambda item: -item[1])),
+            }
+    return {"saturated_at_concurrency": None}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    install_stubs(args, rng)
+    runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=InMemorySessionService())
+
+    tracemalloc.start()
+    levels = []
+    for concurrency in args.levels:
+        print(f"Running {concurrency} concurrent users x {args.inspections_per_user} inspections...")
+        result = await run_level(runner, concurrency, args)
+        print(
+            f"  {result['completed']} completed, {result['failed']} failed, "
+            f"{result['throughput_per_minute']}/min, p95 {result['end_to_end']['p95']}s"
+        )
+        levels.append(result)
+    tracemalloc.stop()
+
+    return {
+        "config": {
+            "levels": args.levels,
+            "inspections_per_user": args.inspections_per_user,
+            "model_latency": args.model_latency,
+            "model_concurrency": args.model_concurrency,
+            "quota_rpm": args.quota_rpm,
+            "retrieval_latency": args.retrieval_latency,
+            "retrieval_top_k": args.retrieval_top_k,
+            "evidence_pdf": args.evidence_pdf,
+            "seed": args.seed,
+        },
+        "levels": levels,
+        "saturation": find_saturation(levels),
+        "quota": quota.quota_metrics() if args.quota_rpm else None,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the inspection pipeline against local stubs.")
+    parser.add_argument("--levels", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4, 8, 16],
+                        help="Comma-separated concurrency levels to ramp through.")
+    parser.add_argument("--inspections-per-user", type=int, default=2)
+    parser.add_argument("--model-latency", default="lognormal:1.5,0.4",
+                        help="Latency distribution of a stubbed model call.")
+    parser.add_argument("--model-concurrency", type=int, default=64,
+                        help="Maximum concurrent model calls (emulates provider limits).")
+    parser.add_argument("--quota-rpm", type=int, default=None,
+                        help="Admit stubbed model calls through the quota scheduler at this requests-per-minute limit.")
+    parser.add_argument("--retrieval-latency", default="uniform:0.05,0.3",
+                        help="Latency distribution of a stubbed Qdrant query.")
+    parser.add_argument("--retrieval-top-k", type=int, default=2)
+    parser.add_argument("--response-chars", type=int, default=2000,
+                        help="Length of each stubbed model answer.")
+    parser.add_argument("--evidence-pdf", default=None,
+                        help="PDF extracted for every inspection; synthetic text is used when omitted.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="load_test_report.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Command line access to the report store.
+
+Examples:
+    python -m scripts.manage_reports list --school "Al Noor School" --since 2025-07-01
+    python -m scripts.manage_reports prune --max-age-days 365 --max-reports 500
+    python -m scripts.manage_reports import-legacy
+"""
+import argparse
+import json
+from dataclasses import asdict
+from datetime import datetime
+
+from main_agent.core.report_store import get_report_store
+
+
+def list_reports(args: argparse.Namespace) -> None:
+    records = get_report_store().find(
+        school_id=args.school,
+        since=datetime.fromisoformat(args.since) if args.since else None,
+        until=datetime.fromisoformat(args.until) if args.until else None,
+        limit=args.limit,
+    )
+    if args.json:
+        print(json.dumps([asdict(record) for record in records], indent=2))
+        return
+    for record in records:
+        print(f"{record.created_at}  {record.school_id or '-':<30}  {record.pdf_path}")
+    print(f"{len(records)} report(s).")
+
+
+def prune_reports(args: argparse.Namespace) -> None:
+    removed = get_report_store().enforce_retention(args.max_age_days, args.max_reports)
+    for path in removed:
+        print(f"Removed {path}")
+    print(f"{len(removed)} report(s) evicted.")
+
+
+def import_legacy_reports(args: argparse.Namespace) -> None:
+    imported = get_report_store().import_legacy()
+    print(f"Indexed {imported} existing report(s).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and maintain the inspection report store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="List reports by school and/or date.")
+    list_parser.add_argument("--school", default=None, help="Exact school name or ID.")
+    list_parser.add_argument("--since", default=None, help="ISO date/time, inclusive.")
+    list_parser.add_argument("--until", default=None, help="ISO date/time, exclusive.")
+    list_parser.add_argument("--limit", type=int, default=50)
+    list_parser.add_argument("--json", action="store_true", help="Print records as JSON.")
+    list_parser.set_defaults(handler=list_reports)
+
+    prune_parser = commands.add_parser("prune", help="Apply retention and eviction limits.")
+    prune_parser.add_argument("--max-age-days", type=int, default=None)
+    prune_parser.add_argument("--max-reports", type=int, default=None)
+    prune_parser.set_defaults(handler=prune_reports)
+
+    import_parser = commands.add_parser("import-legacy", help="Index reports written before the store existed.")
+    import_parser.set_defaults(handler=import_legacy_reports)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
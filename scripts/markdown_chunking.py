@@ -0,0 +1,319 @@
+"""
+Structure-aware chunking of the Markdown produced by pymupdf4llm.
+
+Chunks follow the heading hierarchy: consecutive sections under the same
+top-level heading are merged while they fit the target size, and large
+sections are split on block boundaries. Tables and performance-level
+descriptor blocks (Outstanding / Very good / ... / Very weak) are kept whole
+up to a hard ceiling; beyond it, tables are split by rows with the header
+repeated. Every chunk carries its heading path as metadata.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from llama_index.core import Document
+from llama_index.core.schema import NodeRelationship, TextNode
+
+# Chunk size bounds in characters (roughly 4 characters per token)
+TARGET_CHUNK_CHARS = 2000
+MIN_CHUNK_CHARS = 500
+MAX_CHUNK_CHARS = 4000
+# Descriptor blocks and tables may grow up to this size before they are split;
+# it stays below the 2048-token input limit of text-embedding-004
+MAX_ATOMIC_CHUNK_CHARS = 7000
+
+PERFORMANCE_LEVELS = ("outstanding", "very good", "good", "acceptable", "weak", "very weak")
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+BOLD_LINE_RE = re.compile(r"^\*\*([^*]+)\*\*:?$")
+TABLE_LINE_RE = re.compile(r"^\s*\|.*\|\s*$")
+TABLE_SEPARATOR_RE = re.compile(r"^\s*\|?\s*:?-{3,}")
+PAGE_NUMBER_RE = re.compile(r"^\s*\d{1,4}\s*$")
+LEVEL_START_RE = re.compile(
+    r"^\W*(" + "|".join(sorted(PERFORMANCE_LEVELS, key=len, reverse=True)) + r")\b", re.IGNORECASE
+)
+# A bold line that is only a level name, e.g. "**Very good**" or "**Outstanding:**"
+LEVEL_LABEL_RE = re.compile(
+    r"^\W*(" + "|".join(sorted(PERFORMANCE_LEVELS, key=len, reverse=True)) + r")\W*$", re.IGNORECASE
+)
+
+
+@dataclass
+class Block:
+    """
+    A contiguous piece of a section.
+
+    Attributes:
+        kind: "text" or "table".
+        start: Offset of the block in the document, or -1 if the text was rebuilt.
+        end: End offset of the block in the document, or -1.
+        text: The block's Markdown.
+        descriptor: Whether the block describes performance levels and must stay whole.
+    """
+    kind: str
+    start: int
+    end: int
+    text: str
+    descriptor: bool = False
+
+    @property
+    def atomic(self) -> bool:
+        return self.kind == "table" or self.descriptor
+
+
+@dataclass
+class Section:
+    heading_path: List[str]
+    heading: Optional[Block] = None
+    blocks: List[Block] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return sum(len(block.text) for block in self.blocks)
+
+    @property
+    def has_content(self) -> bool:
+        return any(block is not self.heading for block in self.blocks)
+
+
+def _clean_heading(text: str) -> str:
+    text = re.sub(r"[*_`]", "", text)
+    # Drop emoji and other symbols pymupdf4llm carries over from the PDF
+    text = re.sub(r"[^\w\s&()'’,.:;/–-]", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _mentions_levels(text: str) -> int:
+    lowered = text.lower()
+    # "very good" / "very weak" also contain "good" / "weak"; count each level name once
+    found = {level for level in PERFORMANCE_LEVELS if re.search(rf"\b{level}\b", lowered)}
+    return len(found)
+
+
+def _is_descriptor(block: Block) -> bool:
+    if block.kind == "table":
+        header = block.text.splitlines()[0]
+        return _mentions_levels(header) >= 2 or _mentions_levels(block.text) >= 3
+    return bool(LEVEL_START_RE.match(block.text))
+
+
+def parse_sections(text: str) -> List[Section]:
+    """Splits Markdown into sections (one per heading) made of text and table blocks."""
+    sections = [Section(heading_path=[])]
+    heading_levels: List[Tuple[int, str]] = []
+    lines = text.splitlines(keepends=True)
+
+    position = 0
+    current: Optional[Block] = None
+    # Level of the last "#" heading; bold-only sub-headings sit one level below it
+    markdown_level = 0
+    # Inside a run of bold level labels, whose paragraphs are kept in one block
+    in_levels = False
+
+    def close_block() -> None:
+        nonlocal current
+        if current is not None and current.text.strip():
+            current.text = current.text.strip("\n")
+            sections[-1].blocks.append(current)
+        current = None
+
+    def open_section(level: int, title: str, heading: Block) -> None:
+        nonlocal in_levels
+        close_block()
+        in_levels = False
+        while heading_levels and heading_levels[-1][0] >= level:
+            heading_levels.pop()
+        heading_levels.append((level, title))
+        # The heading line is kept so it can lead the text when sections are merged
+        sections.append(Section(heading_path=[t for _, t in heading_levels], heading=heading, blocks=[heading]))
+
+    for line in lines:
+        start, position = position, position + len(line)
+        stripped = line.strip()
+
+        heading = HEADING_RE.match(stripped)
+        bold = BOLD_LINE_RE.match(stripped)
+        if heading and _clean_heading(heading.group(2)):
+            markdown_level = len(heading.group(1))
+            open_section(markdown_level, _clean_heading(heading.group(2)), Block("text", start, position, stripped))
+            continue
+        if bold and LEVEL_LABEL_RE.match(bold.group(1)):
+            # Bold level labels introduce descriptor paragraphs rather than sub-sections;
+            # the whole run of levels becomes one block, which is flagged as a descriptor
+            if not in_levels:
+                close_block()
+                in_levels = True
+        elif bold and _clean_heading(bold.group(1)) and len(stripped) <= 120:
+            # Bold-only lines are sub-headings in pymupdf4llm output
+            open_section(markdown_level + 1, _clean_heading(bold.group(1)), Block("text", start, position, stripped))
+            continue
+        if not stripped or PAGE_NUMBER_RE.match(stripped):
+            if current is not None and current.kind == "text":
+                if not in_levels:
+                    close_block()
+                elif not stripped:
+                    current.text += line
+            continue
+
+        kind = "table" if TABLE_LINE_RE.match(line) or (
+            current is not None and current.kind == "table" and TABLE_SEPARATOR_RE.match(line)
+        ) else "text"
+        if current is not None and current.kind != kind:
+            close_block()
+        if current is None:
+            current = Block(kind=kind, start=start, end=position, text=line)
+        else:
+            current.text += line
+            current.end = position
+    close_block()
+
+    # Consecutive level descriptor paragraphs (one per level) form one block
+    for section in sections:
+        grouped: List[Block] = []
+        for block in section.blocks:
+            if block is not section.heading and _is_descriptor(block):
+                previous = grouped[-1] if grouped else None
+                if previous is not None and previous.descriptor and previous.kind == block.kind == "text":
+                    previous.text += "\n\n" + block.text
+                    previous.end = block.end
+                    continue
+                block.descriptor = True
+            grouped.append(block)
+        section.blocks = grouped
+
+    return [section for section in sections if section.has_content]
+
+
+def _split_table(block: Block, max_chars: int) -> List[Block]:
+    """Splits an oversized table by rows, repeating the header rows in every part."""
+    rows = block.text.splitlines()
+    header_size = 2 if len(rows) > 1 and TABLE_SEPARATOR_RE.match(rows[1]) else 1
+    header, body = rows[:header_size], rows[header_size:]
+    parts, current = [], []
+    for row in body:
+        if current and len("\n".join(header + current + [row])) > max_chars:
+            parts.append(current)
+            current = []
+        current.append(row)
+    if current:
+        parts.append(current)
+    return [Block(kind=block.kind, start=-1, end=-1, text="\n".join(header + part)) for part in parts]
+
+
+def _split_text(block: Block, max_chars: int) -> List[Block]:
+    """Splits oversized prose on sentence boundaries."""
+    sentences = re.split(r"(?<=[.!?])\s+", block.text)
+    parts, current = [], ""
+    for sentence in sentences:
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        parts.append(current)
+    return [Block(kind=block.kind, start=-1, end=-1, text=part) for part in parts]
+
+
+def _pieces(block: Block) -> List[Block]:
+    """Returns the block itself, or its parts if it is over its size ceiling."""
+    ceiling = MAX_ATOMIC_CHUNK_CHARS if block.atomic else MAX_CHUNK_CHARS
+    if len(block.text) <= ceiling:
+        return [block]
+    pieces = _split_table(block, ceiling) if block.kind == "table" else _split_text(block, ceiling)
+    for piece in pieces:
+        piece.descriptor = block.descriptor
+    return pieces
+
+
+def _merge_sections(sections: List[Section]) -> List[Section]:
+    """
+    Merges consecutive sections under the same top-level heading while they fit
+    TARGET_CHUNK_CHARS; sections below MIN_CHUNK_CHARS may grow up to MAX_CHUNK_CHARS.
+    The merged section keeps the common part of the heading paths. A preamble
+    without a heading merges only into the next section and takes its path.
+    """
+    merged: List[Section] = []
+    for section in sections:
+        previous = merged[-1] if merged else None
+        if previous is not None:
+            common = []
+            for a, b in zip(previous.heading_path, section.heading_path):
+                if a != b:
+                    break
+                common.append(a)
+            combined = previous.size + section.size
+            # Text before the first heading (cover, title) only joins the section that follows it
+            preamble = not previous.heading_path
+            related = bool(common) or preamble
+            fits = combined <= TARGET_CHUNK_CHARS or (
+                previous.size < MIN_CHUNK_CHARS and combined <= MAX_CHUNK_CHARS
+            )
+            if related and fits:
+                previous.blocks.extend(section.blocks)
+                previous.heading_path = list(section.heading_path) if preamble else common
+                continue
+        merged.append(section)
+    return merged
+
+
+def chunk_markdown_document(document: Document) -> List[TextNode]:
+    """
+    Chunks a Markdown document along its heading and table structure.
+
+    Args:
+        document: A document whose text is pymupdf4llm Markdown.
+
+    Returns:
+        Text nodes with `heading_path` and `chunk_type` metadata, linked to the document.
+    """
+    source = document.text
+    nodes: List[TextNode] = []
+    for section in _merge_sections(parse_sections(source)):
+        heading_path = " > ".join(section.heading_path)
+        chunk: List[Block] = []
+
+        def flush() -> None:
+            if not chunk:
+                return
+            text = "\n\n".join(block.text for block in chunk)
+            if any(block.descriptor for block in chunk):
+                chunk_type = "descriptor"
+            else:
+                chunk_type = "table" if any(block.kind == "table" for block in chunk) else "text"
+            start, end = chunk[0].start, chunk[-1].end
+            contiguous = start >= 0 and all(block.start >= 0 for block in chunk)
+            node = TextNode(
+                text=text,
+                metadata={**document.metadata, "heading_path": heading_path, "chunk_type": chunk_type},
+                excluded_embed_metadata_keys=["chunk_type"],
+                excluded_llm_metadata_keys=["chunk_type"],
+                start_char_idx=start if contiguous else None,
+                end_char_idx=end if contiguous else None,
+            )
+            node.relationships[NodeRelationship.SOURCE] = document.as_related_node_info()
+            nodes.append(node)
+            chunk.clear()
+
+        for block in section.blocks:
+            for piece in _pieces(block):
+                size = sum(len(b.text) for b in chunk)
+                # Tables and descriptors start their own chunk, but keep a short lead-in (e.g. the heading)
+                if piece.atomic:
+                    split = size >= MIN_CHUNK_CHARS
+                else:
+                    split = size + len(piece.text) > TARGET_CHUNK_CHARS
+                if chunk and split:
+                    flush()
+                chunk.append(piece)
+                if piece.atomic and len(piece.text) >= TARGET_CHUNK_CHARS:
+                    flush()
+        flush()
+    return nodes
+
+
+def chunk_documents(documents: List[Document]) -> List[TextNode]:
+    nodes: List[TextNode] = []
+    for document in documents:
+        nodes.extend(chunk_markdown_document(document))
+    return nodes
@@ -0,0 +1,4 @@
+import os
+
+# Importing main_agent builds the agents, whose clients need (placeholder) credentials
+os.environ.setdefault("GOOGLE_API_KEY", "test-placeholder")
@@ -0,0 +1,80 @@
+from llama_index.core.schema import NodeWithScore, TextNode
+
+from main_agent.core.config import settings
+from main_agent.tools.context_packing import (
+    chunk_token_budget,
+    fit_to_budget,
+    merge_overlapping,
+    pack_context,
+    passages_from_nodes,
+)
+from scripts.markdown_chunking import MAX_ATOMIC_CHUNK_CHARS
+
+
+def node(text: str, start: int, end: int, score: float = 0.5, chunk_type: str = "text") -> NodeWithScore:
+    return NodeWithScore(
+        node=TextNode(
+            text=text,
+            metadata={"file_name": "framework.pdf", "chunk_type": chunk_type},
+            start_char_idx=start,
+            end_char_idx=end,
+        ),
+        score=score,
+    )
+
+
+def test_adjacent_chunks_separated_by_blank_lines_are_merged():
+    document = "## Teaching\n\nFirst paragraph.\n\n| Level | Descriptor |\n|---|---|\n| Good | Clear |"
+    first_end = document.index("\n\n|")
+    second_start = first_end + 2
+    passages = merge_overlapping(
+        passages_from_nodes([node(document[:first_end], 0, first_end), node(document[second_start:], second_start, len(document))]),
+        max_gap=16,
+    )
+    assert len(passages) == 1
+    assert passages[0].text == document
+
+
+def test_overlap_is_sliced_by_text_not_offsets():
+    # The second chunk's text was stripped, so it is shorter than its offset span
+    first = node("Students make good progress in Arabic.", 100, 138)
+    second = node("progress in Arabic. Teachers plan well.", 115, 160)
+    passages = merge_overlapping(passages_from_nodes([first, second]))
+    assert [p.text for p in passages] == ["Students make good progress in Arabic. Teachers plan well."]
+
+
+def test_chunks_beyond_the_gap_stay_separate():
+    passages = merge_overlapping(passages_from_nodes([node("alpha", 0, 5), node("beta", 100, 104)]), max_gap=16)
+    assert [p.text for p in passages] == ["alpha", "beta"]
+
+
+def test_seen_chunks_are_dropped_on_the_next_call():
+    seen = set()
+    nodes = [node("Outstanding leadership sets a clear vision.", 0, 44, score=0.9)]
+    packed, dropped = pack_context(nodes, seen, token_budget=1000)
+    assert len(packed) == 1 and dropped == 0
+    packed, dropped = pack_context(nodes, seen, token_budget=1000)
+    assert packed == [] and dropped == 1
+
+
+def test_descriptor_is_skipped_not_cut_and_smaller_passages_still_fit():
+    descriptor = node("Outstanding: all students excel. " * 60, 0, 1980, score=0.9, chunk_type="descriptor")
+    smaller = node("Teachers check understanding.", 5000, 5029, score=0.4)
+    packed = fit_to_budget(passages_from_nodes([descriptor, smaller]), token_budget=200)
+    assert [p.text for p in packed] == ["Teachers check understanding."]
+
+
+def test_text_passage_is_cut_when_it_does_not_fit():
+    long_text = node("word " * 400, 0, 2000, score=0.9)
+    packed = fit_to_budget(passages_from_nodes([long_text]), token_budget=100)
+    assert len(packed) == 1 and packed[0].metadata["truncated"]
+
+
+def test_default_budget_holds_top_k_whole_atomic_chunks():
+    assert settings.RETRIEVAL_MAX_CHUNK_CHARS == MAX_ATOMIC_CHUNK_CHARS
+    chunks = [
+        node("a" * MAX_ATOMIC_CHUNK_CHARS, i * 10_000, i * 10_000 + MAX_ATOMIC_CHUNK_CHARS, chunk_type="descriptor")
+        for i in range(settings.RETRIEVAL_TOP_K)
+    ]
+    budget = chunk_token_budget(settings.RETRIEVAL_TOP_K, settings.RETRIEVAL_MAX_CHUNK_CHARS)
+    assert len(fit_to_budget(passages_from_nodes(chunks), budget)) == settings.RETRIEVAL_TOP_K
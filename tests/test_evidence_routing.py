@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from main_agent.evidence import routing
+from main_agent.evidence.routing import (
+    AUDIO_EVIDENCE,
+    TEXTUAL_EVIDENCE,
+    VIDEO_EVIDENCE,
+    EvidenceSource,
+    extract_source,
+    merge_evidence,
+)
+from main_agent.evidence.video import VIDEO_EVIDENCE_FILES, attach_video_evidence
+
+
+def write_source(tmp_path, name: str, content: str) -> EvidenceSource:
+    path = tmp_path / name
+    path.write_text(content)
+    return EvidenceSource(name=name, path=str(path), size_bytes=len(content))
+
+
+def test_files_are_routed_by_type(tmp_path):
+    notes = extract_source(write_source(tmp_path, "notes.txt", "Lesson notes"))
+    transcript = extract_source(write_source(
+        tmp_path, "lesson.vtt", "WEBVTT\n\n1\n00:00:01.000 --> 00:00:04.000\nGood morning class"
+    ))
+    audio = extract_source(write_source(tmp_path, "lesson.mp3", "binary"))
+    assert (notes.route, notes.content) == (TEXTUAL_EVIDENCE, "Lesson notes")
+    assert (transcript.route, transcript.content) == (AUDIO_EVIDENCE, "Good morning class")
+    assert audio.route is None and "transcript" in audio.note
+
+
+def test_videos_are_uploaded_and_attached_to_the_video_agent_request(tmp_path, monkeypatch):
+    uploaded = types.File(name="files/abc", uri="https://files.example/abc", mime_type="video/mp4")
+    monkeypatch.setattr(routing, "upload_video", lambda path, name: uploaded)
+    video = extract_source(write_source(tmp_path, "lesson.mp4", "binary"))
+    state = merge_evidence([video])
+
+    assert state[VIDEO_EVIDENCE] == "lesson.mp4: https://files.example/abc"
+    assert state[VIDEO_EVIDENCE_FILES] == [
+        {"name": "lesson.mp4", "uri": "https://files.example/abc", "mime_type": "video/mp4"}
+    ]
+
+    user_turn = types.Content(role="user", parts=[types.Part(text="Start the inspection.")])
+    request = LlmRequest(contents=[user_turn])
+    attach_video_evidence(SimpleNamespace(state=state), request)
+    parts = request.contents[-1].parts
+    assert parts[0].text == "Start the inspection."
+    assert parts[1].file_data.file_uri == "https://files.example/abc"
+    # The session's stored turn is not modified
+    assert len(user_turn.parts) == 1
+
+
+def test_failed_video_upload_is_skipped_with_a_note(tmp_path, monkeypatch):
+    def fail(path, name):
+        raise RuntimeError("Video processing failed: unsupported codec")
+
+    monkeypatch.setattr(routing, "upload_video", fail)
+    video = extract_source(write_source(tmp_path, "lesson.mkv", "binary"))
+    assert video.route is None and "unsupported codec" in video.note
+    assert merge_evidence([video])[VIDEO_EVIDENCE] == ""
@@ -0,0 +1,47 @@
+from llama_index.core import Document
+
+from scripts.markdown_chunking import chunk_markdown_document, parse_sections
+
+
+def chunk(text: str):
+    return chunk_markdown_document(Document(text=text, metadata={"file_name": "framework.pdf"}))
+
+
+def test_preamble_joins_only_the_first_section():
+    nodes = chunk("Intro para.\n\n# A\n\ntext a\n\n# B\n\ntext b\n\n# C\n\ntext c")
+    assert [node.metadata["heading_path"] for node in nodes] == ["A", "B", "C"]
+    assert nodes[0].text.startswith("Intro para.")
+
+
+def test_small_sibling_sections_merge_under_their_common_heading():
+    nodes = chunk("# Standard 1\n\n## 1.1 Attainment\n\ntext one\n\n## 1.2 Progress\n\ntext two\n\n# Standard 2\n\ntext three")
+    assert [node.metadata["heading_path"] for node in nodes] == ["Standard 1", "Standard 2"]
+
+
+def test_descriptor_table_stays_whole_with_its_heading():
+    rows = "\n".join(f"| Indicator {i} | Outstanding detail | Good detail | Weak detail |" for i in range(10))
+    table = "| Indicator | Outstanding | Good | Weak |\n|---|---|---|---|\n" + rows
+    nodes = chunk("# Teaching\n\n" + "Long prose. " * 60 + "\n\n## Levels\n\n" + table)
+    descriptor = [node for node in nodes if node.metadata["chunk_type"] == "descriptor"]
+    assert len(descriptor) == 1
+    assert table in descriptor[0].text
+
+
+def test_bold_level_labels_keep_the_descriptor_set_whole():
+    levels = ["Outstanding", "Very good", "Good", "Acceptable", "Weak", "Very weak"]
+    paragraph = "Students' attainment in lessons and in their recent work is described here in detail. " * 5
+    body = "\n\n".join(f"**{level}**\n\n{paragraph}" for level in levels)
+    nodes = chunk("# Standard 1\n\n## 1.1 Attainment\n\nHow attainment is judged.\n\n" + body + "\n\n## 1.2 Progress\n\ntext")
+
+    descriptor = [node for node in nodes if node.metadata["chunk_type"] == "descriptor"]
+    assert len(descriptor) == 1
+    assert all(f"**{level}**" in descriptor[0].text for level in levels)
+    assert descriptor[0].metadata["heading_path"] == "Standard 1 > 1.1 Attainment"
+
+
+def test_bold_lines_starting_with_a_level_word_are_still_headings():
+    sections = parse_sections("# Teaching\n\nIntro.\n\n**Good practice in assessment**\n\nDetails.")
+    assert [section.heading_path for section in sections] == [
+        ["Teaching"], ["Teaching", "Good practice in assessment"]
+    ]
+    assert not any(block.descriptor for section in sections for block in section.blocks)
@@ -0,0 +1,56 @@
+import pymupdf
+import pytest
+
+from main_agent.core.config import settings
+from main_agent.evidence.pdf_extraction import (
+    EvidenceTooLargeError,
+    extract_pdf_markdown,
+    iter_pdf_markdown,
+    plan_extraction,
+)
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "evidence.pdf"
+    with pymupdf.open() as doc:
+        for number in range(1, 8):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Lesson observation page {number}")
+        doc.save(str(path))
+    return str(path)
+
+
+def test_plan_splits_pages_into_ranges(pdf_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_PAGES_PER_TASK", 3)
+    plan = plan_extraction(pdf_path)
+    assert plan.ranges == [(0, 3), (3, 6), (6, 7)]
+    assert (plan.total_pages, plan.pages_to_extract, plan.truncated) == (7, 7, False)
+
+
+def test_oversized_document_is_truncated(pdf_path, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_EVIDENCE_PAGES", 4)
+    monkeypatch.setattr(settings, "EXTRACTION_PAGES_PER_TASK", 3)
+    monkeypatch.setattr(settings, "OVERSIZE_POLICY", "truncate")
+    plan = plan_extraction(pdf_path)
+    assert plan.ranges == [(0, 3), (3, 4)]
+    assert (plan.pages_to_extract, plan.truncated) == (4, True)
+
+    text, _ = extract_pdf_markdown(pdf_path)
+    assert "page 4" in text and "page 5" not in text
+    assert "4 of 7 pages" in text
+
+
+def test_oversized_document_is_rejected(pdf_path, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_EVIDENCE_PAGES", 4)
+    monkeypatch.setattr(settings, "OVERSIZE_POLICY", "reject")
+    with pytest.raises(EvidenceTooLargeError):
+        plan_extraction(pdf_path)
+
+
+def test_ranges_are_yielded_in_page_order(pdf_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_PAGES_PER_TASK", 1)
+    results = list(iter_pdf_markdown(pdf_path))
+    assert [pages_done for _, pages_done in results] == list(range(1, 8))
+    for number, (markdown_text, _) in enumerate(results, start=1):
+        assert f"page {number}" in markdown_text
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+from google.genai import types
+
+from main_agent.core import quota, resilience
+from main_agent.core.config import settings
+from main_agent.core.llm import ResilientGemini, _request_tokens
+from main_agent.core.quota import ModelLimits, QuotaScheduler
+from main_agent.core.resilience import DeadlineExceededError, ResilientCaller, RetryPolicy
+
+
+@pytest.fixture
+def short_window(monkeypatch):
+    monkeypatch.setattr(quota, "WINDOW_SECONDS", 0.3)
+    monkeypatch.setattr(quota, "MAX_POLL_SECONDS", 0.02)
+
+
+def make_scheduler(rpm: int, tpm: int = 10 ** 9) -> QuotaScheduler:
+    return QuotaScheduler({"model": ModelLimits(rpm=rpm, tpm=tpm)}, ModelLimits(rpm, tpm))
+
+
+def test_waiting_requests_are_admitted_by_priority(short_window):
+    scheduler = make_scheduler(rpm=1)
+    order = []
+
+    async def request(name: str, priority: int) -> None:
+        await scheduler.acquire("model", 10, priority)
+        order.append(name)
+
+    async def main():
+        await request("first", 2)
+        # The window is full, so the rest queue up and are admitted one per window
+        await asyncio.gather(request("analysis", 2), request("synthesis", 1), request("final", 0))
+
+    asyncio.run(main())
+    assert order == ["first", "final", "synthesis", "analysis"]
+
+
+def test_token_limit_delays_requests_until_the_window_frees_up(short_window):
+    scheduler = make_scheduler(rpm=100, tpm=100)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await scheduler.acquire("model", 80, 2)
+        await scheduler.acquire("model", 80, 2)
+        return loop.time() - started
+
+    assert asyncio.run(main()) >= 0.25
+    metrics = scheduler.metrics()["model"]
+    assert metrics["granted"] == 2 and metrics["queue_depth"] == 0
+
+
+def test_retries_keep_their_place_in_the_queue(short_window):
+    scheduler = make_scheduler(rpm=1)
+    order = []
+
+    async def request(name: str, ticket=None) -> None:
+        await scheduler.acquire("model", 10, 2, ticket=ticket)
+        order.append(name)
+
+    async def main():
+        early_ticket = scheduler.new_ticket()
+        await request("first")
+        await asyncio.gather(request("newcomer"), request("retry", ticket=early_ticket))
+
+    asyncio.run(main())
+    assert order == ["first", "retry", "newcomer"]
+
+
+def test_queue_wait_does_not_trip_the_breaker_or_attempt_timeout(short_window):
+    scheduler = make_scheduler(rpm=1)
+    caller = ResilientCaller("model", RetryPolicy(attempt_timeout=0.2, deadline=5.0, failure_threshold=2))
+
+    async def backend():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def request():
+        return await caller.call(backend, admit=lambda: scheduler.acquire("model", 10, 2))
+
+    async def main():
+        return await asyncio.gather(*(request() for _ in range(4)), return_exceptions=True)
+
+    assert asyncio.run(main()) == ["ok"] * 4
+    assert caller.breaker.state == "closed"
+    # Only backend time is recorded, not the queue wait
+    assert caller.histogram.percentile(100) < 0.2
+
+
+def test_admission_past_the_deadline_raises_deadline_exceeded(short_window):
+    scheduler = make_scheduler(rpm=1)
+    caller = ResilientCaller("model", RetryPolicy(attempt_timeout=0.2, deadline=0.1, failure_threshold=1))
+
+    async def backend():
+        return "ok"
+
+    async def main():
+        await scheduler.acquire("model", 10, 2)
+        with pytest.raises(DeadlineExceededError):
+            await caller.call(backend, admit=lambda: scheduler.acquire("model", 10, 2))
+
+    asyncio.run(main())
+    assert caller.breaker.state == "closed"
+    assert caller.histogram.count == 0
+
+
+def test_attached_files_count_toward_the_request_estimate():
+    video = types.Part(file_data=types.FileData(file_uri="files/abc", mime_type="video/mp4"))
+    request = LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text="x" * 400), video])])
+    assert _request_tokens(request) == (
+        101 + settings.QUOTA_FILE_TOKEN_ESTIMATE + settings.QUOTA_OUTPUT_TOKEN_ESTIMATE
+    )
+
+
+def test_hedged_model_request_is_admitted_separately(monkeypatch):
+    scheduler = make_scheduler(rpm=10)
+    monkeypatch.setattr(quota, "_scheduler", scheduler)
+    caller = ResilientCaller("HedgedAgent", RetryPolicy(hedge=True, hedge_min_samples=5, attempt_timeout=5.0))
+    for _ in range(5):
+        caller.histogram.record(0.01)
+    monkeypatch.setitem(resilience._callers, "HedgedAgent", caller)
+    calls = []
+
+    async def fake_generate(self, llm_request, stream=False):
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="done")]))
+
+    monkeypatch.setattr(Gemini, "generate_content_async", fake_generate)
+    model = ResilientGemini(model="model", caller_name="HedgedAgent")
+    request = LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text="hello")])])
+
+    async def main():
+        return [response async for response in model.generate_content_async(request)]
+
+    responses = asyncio.run(main())
+    assert [r.content.parts[0].text for r in responses] == ["done"]
+    assert calls == [0, 1]
+    assert scheduler.metrics()["model"]["granted"] == 2
@@ -0,0 +1,71 @@
+import os
+import threading
+
+from main_agent.core.report_store import ReportStore
+
+
+def fake_render(markdown_content: str, file_path: str) -> None:
+    with open(file_path, "w") as f:
+        f.write(markdown_content)
+
+
+def test_identical_report_is_stored_once(tmp_path):
+    store = ReportStore(str(tmp_path))
+    first, created = store.save_report("# Report", fake_render, session_id="s1")
+    second, created_again = store.save_report("# Report", fake_render, session_id="s2")
+    assert created and not created_again
+    assert first.pdf_path == second.pdf_path and os.path.exists(first.pdf_path)
+
+
+def test_concurrent_identical_reports_keep_the_stored_pdf(tmp_path):
+    store = ReportStore(str(tmp_path))
+    barrier = threading.Barrier(4)
+    records = []
+
+    def render_together(markdown_content: str, file_path: str) -> None:
+        # All runs render in the same second before any of them is indexed
+        barrier.wait()
+        fake_render(markdown_content, file_path)
+
+    def run(session_id: str) -> None:
+        records.append(store.save_report("# Same report", render_together, session_id=session_id)[0])
+
+    threads = [threading.Thread(target=run, args=(f"s{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({record.pdf_path for record in records}) == 1
+    assert os.path.exists(records[0].pdf_path)
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".pdf")] == [os.path.basename(records[0].pdf_path)]
+
+
+def test_rerun_of_the_same_evidence_is_found_despite_different_markdown(tmp_path):
+    store = ReportStore(str(tmp_path))
+    first, _ = store.save_report(
+        "# Report (19 October)", fake_render, session_id="s1", school_id="Al Noor",
+        evidence_hash="pack", model_version="m1", prompt_version="p1",
+    )
+    store.save_report("# Other pack", fake_render, session_id="s2", evidence_hash="other",
+                      model_version="m1", prompt_version="p1")
+
+    match = store.find_rerun("pack", "m1", "p1")
+    assert match is not None and match.pdf_path == first.pdf_path
+    assert store.find_rerun("pack", "m2", "p1") is None
+    assert store.find_rerun("pack", "m1", "p2") is None
+
+    reused = store.record_reuse(match, session_id="s3", school_id="Al Noor")
+    assert reused.pdf_path == first.pdf_path
+    assert store.latest_for_session("s3").report_id == first.report_id
+
+
+def test_missing_pdf_is_rendered_again_and_run_history_is_kept(tmp_path):
+    store = ReportStore(str(tmp_path))
+    first, _ = store.save_report("# Report", fake_render, session_id="s1", school_id="Al Noor")
+    os.remove(first.pdf_path)
+
+    second, created = store.save_report("# Report", fake_render, session_id="s2", school_id="Al Noor")
+    assert created and second.report_id == first.report_id
+    assert os.path.exists(second.pdf_path)
+    assert [record.session_id for record in store.find(school_id="Al Noor")] == ["s2", "s1"]
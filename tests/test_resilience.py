@@ -0,0 +1,203 @@
+import asyncio
+import random
+
+import pytest
+
+from main_agent.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    ResilientCaller,
+    RetryPolicy,
+)
+
+
+class FakeClock:
+    """Manually advanced clock; `sleep` advances it instead of waiting."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class MaxRandom(random.Random):
+    """Always draws the upper bound, exposing the backoff ceiling."""
+    def uniform(self, a, b):
+        return b
+
+
+class ServerError(Exception):
+    code = 503
+
+
+class BadRequest(Exception):
+    code = 400
+
+
+def make_caller(clock: FakeClock, rng=None, **policy) -> ResilientCaller:
+    return ResilientCaller("test", RetryPolicy(**policy), sleep=clock.sleep, clock=clock, rng=rng)
+
+
+def test_backoff_delay_stays_within_jittered_exponential_bounds():
+    caller = make_caller(FakeClock(), rng=random.Random(1), base_delay=0.5, max_delay=4.0)
+    for attempt in range(1, 8):
+        ceiling = min(4.0, 0.5 * 2 ** (attempt - 1))
+        for _ in range(50):
+            assert 0 <= caller.backoff_delay(attempt) <= ceiling
+
+    capped = make_caller(FakeClock(), rng=MaxRandom(), base_delay=0.5, max_delay=4.0)
+    assert [capped.backoff_delay(a) for a in range(1, 6)] == [0.5, 1.0, 2.0, 4.0, 4.0]
+
+
+def test_retries_with_backoff_until_success():
+    clock = FakeClock()
+    caller = make_caller(clock, rng=MaxRandom(), max_attempts=3, base_delay=1.0)
+    calls = []
+
+    async def flaky():
+        calls.append(clock.now)
+        if len(calls) < 3:
+            raise ServerError()
+        return "ok"
+
+    assert asyncio.run(caller.call(flaky)) == "ok"
+    assert clock.sleeps == [1.0, 2.0]
+    assert caller.breaker.state == "closed"
+
+
+def test_deadline_exhaustion_raises_deadline_exceeded():
+    clock = FakeClock()
+    caller = make_caller(clock, rng=MaxRandom(), deadline=5.0, max_attempts=10, base_delay=1.0, failure_threshold=100)
+
+    async def slow_failure():
+        clock.now += 1.5
+        raise ServerError()
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(caller.call(slow_failure))
+    # The second attempt fails at 4s; its 2s backoff would pass the 5s deadline
+    assert clock.sleeps == [1.0]
+
+
+def test_non_retryable_errors_are_raised_without_opening_the_breaker():
+    clock = FakeClock()
+    caller = make_caller(clock, failure_threshold=2)
+
+    async def bad_request():
+        raise BadRequest()
+
+    for _ in range(3):
+        with pytest.raises(BadRequest):
+            asyncio.run(caller.call(bad_request))
+    assert clock.sleeps == []
+    assert caller.breaker.state == "closed"
+
+
+def test_breaker_opens_then_half_opens_then_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 10.0
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    # Only one trial call is let through while half-open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_trial_call_reopens_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=clock)
+    breaker.record_failure()
+    clock.now += 10.0
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_caller_fails_fast_while_breaker_is_open():
+    clock = FakeClock()
+    caller = make_caller(clock, max_attempts=1, failure_threshold=1, reset_timeout=30.0)
+    calls = 0
+
+    async def down():
+        nonlocal calls
+        calls += 1
+        raise ServerError()
+
+    with pytest.raises(ServerError):
+        asyncio.run(caller.call(down))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(caller.call(down))
+    assert calls == 1
+
+
+def test_hedged_request_wins_over_slow_first_attempt():
+    caller = ResilientCaller("test", RetryPolicy(hedge=True, hedge_min_samples=5, attempt_timeout=5.0))
+    for _ in range(5):
+        caller.histogram.record(0.01)
+    started = []
+
+    async def attempt():
+        started.append(len(started))
+        if len(started) == 1:
+            await asyncio.sleep(10)
+            return "slow"
+        return "hedged"
+
+    assert asyncio.run(caller.call(attempt)) == "hedged"
+    assert started == [0, 1]
+
+
+def test_no_hedge_before_enough_latency_samples():
+    caller = ResilientCaller("test", RetryPolicy(hedge=True, hedge_min_samples=5))
+    assert caller.hedge_delay() is None
+    for _ in range(5):
+        caller.histogram.record(0.2)
+    assert caller.hedge_delay() == 0.2
+
+
+def test_cancelled_trial_call_releases_the_half_open_breaker():
+    clock = FakeClock()
+    caller = make_caller(clock, max_attempts=1, failure_threshold=1, reset_timeout=10.0)
+
+    async def down():
+        raise ServerError()
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return "ok"
+
+    async def main():
+        with pytest.raises(ServerError):
+            await caller.call(down)
+        clock.now += 10.0
+        trial = asyncio.ensure_future(caller.call(hang))
+        await asyncio.sleep(0)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert caller.breaker.state == "half_open"
+        return await caller.call(ok)
+
+    assert asyncio.run(main()) == "ok"
+    assert caller.breaker.state == "closed"
@@ -2,8 +2,9 @@
 import streamlit as st
 import asyncio
 import os
+import shutil
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, List
 import sys, pathlib; sys.path.extend(
     str(p) for p in {
         pathlib.Path(__file__).resolve().parent.parent,
@@ -13,10 +14,24 @@ import sys, pathlib; sys.path.extend(
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
-import pymupdf4llm
 
 # Import the root agent from your project structure
 from main_agent.agent import root_agent
+from main_agent.core.config import settings
+from main_agent.core.report_store import get_report_store
+from main_agent.core.quota import quota_metrics
+from main_agent.core.resilience import latency_report
+from main_agent.evidence.pdf_extraction import EvidenceTooLargeError, save_upload
+from main_agent.evidence.routing import (
+    SUPPORTED_EXTENSIONS,
+    EvidenceSource,
+    ExtractedEvidence,
+    evidence_hash,
+    extract_evidence,
+    merge_evidence,
+)
+from main_agent.prompts.instructions import PROMPT_VERSION
+from main_agent.tools.rag_orchestrator import SEEN_PASSAGES_STATE_KEY
 
 # --- Configuration ---
 APP_NAME = "school_inspection_app"
@@ -49,8 +64,26 @@ async def get_or_create_session(runner: Runner, session_id: str) -> None:
 
 # --- Main Application Logic ---
 
+def show_evidence_summary(extracted: List[ExtractedEvidence]) -> None:
+    """Shows where each uploaded file was routed and how much evidence it contributed."""
+    rows = [
+        {
+            "File": item.source.name,
+            "Type": item.kind,
+            "Routed to": item.route or "skipped",
+            "Size (KB)": round(item.source.size_bytes / 1024, 1),
+            "Characters": item.chars,
+            "Note": item.note,
+        }
+        for item in extracted
+    ]
+    with st.session_state.placeholders["evidence"]:
+        with st.expander(f"Evidence pack: {len(extracted)} file(s)", expanded=False):
+            st.dataframe(rows, hide_index=True)
+
+
 async def run_inspection_pipeline(
-    pdf_path: str, session_id: str
+    sources: List[EvidenceSource], session_id: str, school_id: str, pack_hash: str
 ) -> None:
     """
     Runs the full inspection pipeline and updates the UI with results.
@@ -64,20 +97,31 @@ async def run_inspection_pipeline(
     st.session_state.error = None
 
     try:
-        # 1. Read and prepare textual evidence from the uploaded PDF
+        # 1. Extract every uploaded file and route it to the matching pipeline input
         with st.session_state.placeholders["status"]:
-            st.info("Step 1: Extracting text from the uploaded PDF...")
-        textual_evidence = pymupdf4llm.to_markdown(pdf_path, write_images=False)
-        if not textual_evidence:
-            st.session_state.error = "Could not extract any text from the PDF. Please try another file."
+            st.info(f"Step 1: Extracting evidence from {len(sources)} file(s)...")
+
+        def show_extraction_progress(message: str) -> None:
+            with st.session_state.placeholders["status"]:
+                st.info(f"Step 1: Extracting evidence... {message}")
+
+        extracted = extract_evidence(sources, on_progress=show_extraction_progress)
+        evidence_state = merge_evidence(extracted)
+        show_evidence_summary(extracted)
+        if not any(evidence_state.values()):
+            st.session_state.error = "Could not extract any evidence from the uploaded files. Please try other files."
             with st.session_state.placeholders["status"]:
                 st.error(st.session_state.error)
             return
 
         initial_state = {
-            "textual_evidence": textual_evidence,
-            "video_evidence_uri": "",
-            "audio_evidence_transcript": ""
+            **evidence_state,
+            # Recorded with the generated report in the report store
+            "session_id": session_id,
+            "school_id": school_id,
+            "evidence_hash": pack_hash,
+            # Framework passages may be returned again in a new inspection run
+            SEEN_PASSAGES_STATE_KEY: []
         }
         
         with st.session_state.placeholders["status"]:
@@ -107,17 +151,25 @@ async def run_inspection_pipeline(
                         with st.expander(f"✅ Output from: **{author}**", expanded=True):
                             st.markdown(response_text)
 
-            # Capture the generated PDF path from the tool's response
+            # Once the report is stored, look it up in the report store
             if event.content and event.content.parts and event.content.parts[0].function_response:
                 func_response = event.content.parts[0].function_response
                 if func_response.name == "create_pdf_report":
                     response_data = func_response.response
                     if isinstance(response_data, dict) and "pdf_file_path" in response_data:
-                        st.session_state.pdf_path = response_data["pdf_file_path"]
+                        record = get_report_store().latest_for_session(session_id)
+                        st.session_state.pdf_path = record.pdf_path if record else None
 
         with st.session_state.placeholders["status"]:
             st.success("Pipeline finished successfully!")
 
+        # Per-call latency histograms of the backends and the shared quota scheduler's queues
+        with st.session_state.placeholders["latency"].container():
+            with st.expander("Backend latency (retries, hedging, circuit breakers)"):
+                st.json(latency_report())
+            with st.expander("Model quota (queue depth, wait times, usage in the last minute)"):
+                st.json(quota_metrics())
+
 
     except Exception as e:
         st.session_state.error = f"An error occurred during the inspection pipeline: {e}"
@@ -126,12 +178,36 @@ async def run_inspection_pipeline(
         print(f"Error: {e}")
 
 
+def render_past_reports() -> None:
+    """Sidebar listing previously generated reports for a school from the report store."""
+    with st.sidebar:
+        st.header("Past Reports")
+        school_query = st.text_input("School name or ID", key="past_reports_school")
+        if not school_query.strip():
+            return
+        records = get_report_store().find(school_id=school_query.strip(), limit=10)
+        if not records:
+            st.caption("No reports found for this school.")
+        for record in records:
+            if not os.path.exists(record.pdf_path):
+                continue
+            with open(record.pdf_path, "rb") as pdf_file:
+                st.download_button(
+                    label=f"{record.created_at.replace('T', ' ')}",
+                    data=pdf_file,
+                    file_name=os.path.basename(record.pdf_path),
+                    mime="application/pdf",
+                    key=f"past_report_{record.report_id}_{record.created_at}"
+                )
+
+
 def main():
     """Defines the Streamlit UI."""
     st.set_page_config(page_title="UAE School Inspection Assistant", layout="wide")
     st.title("🏫 UAE School Inspection Report Generator")
     st.markdown(
-        "Upload a PDF with inspection evidence (e.g., lesson plans, observation notes). "
+        "Upload the inspection evidence pack: PDFs or text files (e.g., lesson plans, observation notes), "
+        "classroom audio transcripts (.txt with 'transcript' in the name, .vtt, .srt) and classroom videos. "
         "The AI pipeline will analyze it, evaluate it against the UAE framework, and generate a formal report."
     )
     
@@ -148,44 +224,88 @@ def main():
          st.session_state.error = None
 
 
+    render_past_reports()
+
+    school_id = st.text_input("School name or ID", key="school_id")
+
     # File Uploader
-    uploaded_file = st.file_uploader(
-        "Upload Inspection Evidence PDF", type="pdf", key="file_uploader"
+    uploaded_files = st.file_uploader(
+        "Upload Inspection Evidence",
+        type=[extension.lstrip(".") for extension in SUPPORTED_EXTENSIONS],
+        accept_multiple_files=True,
+        key="file_uploader"
+    )
+    reuse_reports = st.checkbox(
+        "Reuse the existing report if this evidence pack was already inspected with the same model and prompts",
+        value=True,
+        key="reuse_reports",
     )
 
-    if uploaded_file:
+    if uploaded_files:
         if st.button("Start Inspection and Generate Report", type="primary"):
             # Clean up state from previous runs
             st.session_state.results = {}
             st.session_state.pdf_path = None
             st.session_state.error = None
             
-            # Save the uploaded file to a temporary location
-            os.makedirs(TEMP_DATA_DIR, exist_ok=True)
-            file_path = os.path.join(TEMP_DATA_DIR, uploaded_file.name)
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Stream the uploaded files to a temporary location for this session
+            upload_dir = os.path.join(TEMP_DATA_DIR, st.session_state.session_id)
+            sources = []
+            try:
+                for index, uploaded_file in enumerate(uploaded_files):
+                    # Prefixed with the index so files with the same name do not overwrite each other
+                    file_name = f"{index:03d}_{os.path.basename(uploaded_file.name)}"
+                    file_path = save_upload(uploaded_file, uploaded_file.size, upload_dir, file_name)
+                    sources.append(EvidenceSource(uploaded_file.name, file_path, uploaded_file.size))
+            except EvidenceTooLargeError as e:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+                st.error(str(e))
+                return
 
-            st.success(f"File '{uploaded_file.name}' uploaded and ready for processing.")
+            total_mb = sum(source.size_bytes for source in sources) / 1024 / 1024
+            st.success(f"{len(sources)} file(s) ({total_mb:.1f} MB) uploaded and ready for processing.")
             st.divider()
 
-            # --- Vertically oriented UI for pipeline results ---
-            st.header("Inspection Pipeline Progress")
-            
-            # Define the order of agents for display
-            agent_names_in_order = [
-                "status", # For general status updates
-                "TextAnalysisAgent",
-                "SynthesisAgent",
-                "FinalReportAgent"
-            ]
-            
-            # Create vertical placeholders
-            for name in agent_names_in_order:
-                st.session_state.placeholders[name] = st.empty()
-            
-            # Run the asynchronous pipeline
-            asyncio.run(run_inspection_pipeline(file_path, st.session_state.session_id))
+            # Model output differs between runs, so re-runs are recognised by evidence, model and prompts
+            pack_hash = evidence_hash(sources)
+            store = get_report_store()
+            previous = store.find_rerun(pack_hash, settings.TEXT_MODEL, PROMPT_VERSION) if reuse_reports else None
+            if previous is not None:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+                record = store.record_reuse(previous, st.session_state.session_id, school_id.strip())
+                st.session_state.pdf_path = record.pdf_path
+                st.info(
+                    f"This evidence pack was already inspected on {previous.created_at}; "
+                    "the existing report is reused. Untick the reuse option to generate a new one."
+                )
+
+            else:
+                # --- Vertically oriented UI for pipeline results ---
+                st.header("Inspection Pipeline Progress")
+
+                # Define the order of agents for display
+                agent_names_in_order = [
+                    "status", # For general status updates
+                    "evidence", # Routing and size accounting of the uploaded files
+                    "VideoAnalysisAgent",
+                    "AudioAnalysisAgent",
+                    "TextAnalysisAgent",
+                    "SynthesisAgent",
+                    "FinalReportAgent",
+                    "latency"
+                ]
+
+                # Create vertical placeholders
+                for name in agent_names_in_order:
+                    st.session_state.placeholders[name] = st.empty()
+
+                # Run the asynchronous pipeline; the uploads are only needed while it runs
+                try:
+                    asyncio.run(run_inspection_pipeline(
+                        sources, st.session_state.session_id, school_id.strip(), pack_hash
+                    ))
+                finally:
+                    shutil.rmtree(upload_dir, ignore_errors=True)
 
     # Display Download Button at the end if PDF is ready
     if st.session_state.get("pdf_path") and os.path.exists(st.session_state.pdf_path):